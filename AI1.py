@@ -1,12 +1,234 @@
+import mmap
+import os
+import sys
+
 import numpy as np
 
+# 所有可能的获胜组合（行、列、对角线）
+WIN_CONDITIONS = [
+    [0, 1, 2],
+    [3, 4, 5],
+    [6, 7, 8],  # 行
+    [0, 3, 6],
+    [1, 4, 7],
+    [2, 5, 8],  # 列
+    [0, 4, 8],
+    [2, 4, 6],  # 对角线
+]
+
+# 位棋盘：第 i 位表示位置 i，获胜组合预先转换为 9 位掩码
+BITS = [1 << i for i in range(9)]
+WIN_MASKS = [sum(BITS[i] for i in condition) for condition in WIN_CONDITIONS]
+FULL_MASK = (1 << 9) - 1
+
+
+def _symmetries():
+    """正方形的 8 种对称（4 种旋转及其左右翻转），变换后位置 i 的棋子取自 perm[i]"""
+    rotate = [6, 3, 0, 7, 4, 1, 8, 5, 2]  # 顺时针旋转 90 度
+    flip = [2, 1, 0, 5, 4, 3, 8, 7, 6]  # 左右翻转
+    perms = []
+    perm = list(range(9))
+    for _ in range(4):
+        perms.append(perm)
+        perms.append([perm[i] for i in flip])
+        perm = [perm[i] for i in rotate]
+    return perms
+
+
+SYMMETRIES = _symmetries()
+# 每种对称下 9 位棋盘的变换查表：SYMMETRY_TABLES[s][bits]
+SYMMETRY_TABLES = [
+    [sum(BITS[i] for i in range(9) if bits & BITS[perm[i]]) for bits in range(512)]
+    for perm in SYMMETRIES
+]
+
+
+def to_bits(board):
+    """把字符串棋盘转换为 (x, o) 位棋盘"""
+    x = o = 0
+    for i in range(9):
+        if board[i] == "X":
+            x |= BITS[i]
+        elif board[i] == "O":
+            o |= BITS[i]
+    return x, o
+
+
+def canonical_key(x, o):
+    """8 种对称变换下取最小编码，作为局面的规范键"""
+    return min((table[x] << 9) | table[o] for table in SYMMETRY_TABLES)
+
+
+class TranspositionTable:
+    """置换表：以规范化局面为键缓存搜索结果，可在多次搜索和多局之间共享"""
+
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """查询缓存，未命中返回 None"""
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """写入缓存，超过容量时淘汰最早写入的条目"""
+        if key not in self.entries and len(self.entries) >= self.max_size:
+            del self.entries[next(iter(self.entries))]
+        self.entries[key] = value
+
+    def hit_rate(self):
+        """命中率"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self):
+        """清空缓存及统计"""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# 默认在同一进程的所有对局之间共享的置换表
+SHARED_TABLE = TranspositionTable()
+
+# ── Alpha-beta 搜索
+STRATEGIES = ("minimax", "alphabeta")
+MOVE_ORDER = [4, 0, 2, 6, 8, 1, 3, 5, 7]  # 中心、角、边
+NEGAMAX_TAG = 1 << 20  # 区分 negamax 与 minimax 在置换表中的键
+EXACT, LOWER, UPPER = 0, 1, 2  # 置换表条目的边界类型
+
+
+def shrink(score):
+    """得分每回传一层向 0 靠近 1，使更快的胜利和更慢的失败得分更高"""
+    return score - (score > 0) + (score < 0)
+
+
+# ── 完美对弈表：每个局面一个字节，下标为三进制棋盘编码（空=0，X=1，O=2）
+MOVE_TABLE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "tictactoe_moves.bin"
+)
+MOVE_TABLE_SIZE = 3**9
+NO_MOVE = 0xFF  # 终局或不可达局面
+# 9 位棋盘到三进制编码的查表
+TERNARY = [sum(3**i for i in range(9) if bits & BITS[i]) for bits in range(512)]
+
+
+def _solve(x, o, solved):
+    """按 X 先手规则求解局面，返回待走方得分（越快取胜得分越高），并记录最佳着法"""
+    index = TERNARY[x] + 2 * TERNARY[o]
+    if index not in solved:
+        x_to_move = bin(x).count("1") == bin(o).count("1")
+        other = o if x_to_move else x
+        best_move, best_score = None, 0
+        if any(other & mask == mask for mask in WIN_MASKS):
+            best_score = -10
+        elif x | o != FULL_MASK:
+            best_score = -float("inf")
+            for i, bit in enumerate(BITS):
+                if not (x | o) & bit:
+                    child = (x | bit, o) if x_to_move else (x, o | bit)
+                    score = shrink(-_solve(*child, solved))
+                    if score > best_score:
+                        best_move, best_score = i, score
+        solved[index] = (best_move, best_score)
+    return solved[index][1]
+
+
+def build_move_table(path=MOVE_TABLE_PATH):
+    """枚举所有合法局面，把最佳着法和胜负写入二进制文件，返回有着法的局面数
+
+    每个字节为 (着法 << 2) | (胜负 + 1)，胜负以待走方为准：1 胜，0 和，-1 负。
+    """
+    global _move_table
+    solved = {}
+    _solve(0, 0, solved)
+    data = bytearray([NO_MOVE]) * MOVE_TABLE_SIZE
+    for index, (move, score) in solved.items():
+        if move is not None:
+            data[index] = (move << 2) | ((score > 0) - (score < 0) + 1)
+    with open(path, "wb") as f:
+        f.write(data)
+    _move_table = None  # 下次查询时重新加载
+    return sum(move is not None for move, _ in solved.values())
+
+
+class MoveTable:
+    """通过 mmap 只读加载的完美对弈表，查询为 O(1)"""
+
+    def __init__(self, path=MOVE_TABLE_PATH):
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.data) != MOVE_TABLE_SIZE:
+            self.data.close()
+            raise ValueError(f"{path} 不是有效的完美对弈表")
+
+    def lookup(self, x, o):
+        """返回 X 先手规则下待走方的 (着法, 胜负)，终局或不可达返回 None"""
+        entry = self.data[TERNARY[x] + 2 * TERNARY[o]]
+        if entry == NO_MOVE:
+            return None
+        return entry >> 2, (entry & 3) - 1
+
+    def close(self):
+        self.data.close()
+
+
+_move_table = None  # 懒加载的完美对弈表，False 表示文件不存在
+
+
+def get_move_table():
+    """返回共享的完美对弈表，文件不存在时返回 None"""
+    global _move_table
+    if _move_table is None:
+        try:
+            _move_table = MoveTable()
+        except (OSError, ValueError):
+            _move_table = False
+    return _move_table or None
+
+
+def table_move(x, o):
+    """查完美对弈表得到 O 的最佳着法，没有表或查不到时返回 None"""
+    table = get_move_table()
+    if table is None:
+        return None
+    n_x, n_o = bin(x).count("1"), bin(o).count("1")
+    if n_x == n_o + 1:
+        entry = table.lookup(x, o)
+    elif n_x == n_o:
+        entry = table.lookup(o, x)  # O 先手：交换双方后 O 即表中的先手方
+    else:
+        return None
+    return entry[0] if entry else None
+
 
 class TicTacToe:
-    def __init__(self):
+    def __init__(self, table=SHARED_TABLE, use_move_table=True, strategy="minimax"):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"未知的搜索策略: {strategy}")
         self.board = np.array([" "] * 9)  # 3x3棋盘
         self.current_player = "X"  # 人类为X，AI为O
         self.game_over = False
         self.winner = None
+        self.nodes = 0  # 上一次搜索访问的节点数
+        self.cutoffs = 0  # 上一次搜索的剪枝次数
+        self.strategy = strategy  # "minimax" 或 "alphabeta"
+        self.table = table  # 置换表，None 表示不缓存
+        self.use_move_table = use_move_table  # 优先查完美对弈表
+
+    def cell(self, position):
+        """返回指定位置的棋子（"X"、"O" 或空格）"""
+        return self.board[position]
 
     def print_board(self):
         """打印棋盘"""
@@ -14,11 +236,11 @@ class TicTacToe:
         for i in range(3):
             print(
                 " "
-                + self.board[i * 3]
+                + self.cell(i * 3)
                 + " | "
-                + self.board[i * 3 + 1]
+                + self.cell(i * 3 + 1)
                 + " | "
-                + self.board[i * 3 + 2]
+                + self.cell(i * 3 + 2)
             )
             if i < 2:
                 print("-----------")
@@ -33,19 +255,7 @@ class TicTacToe:
 
     def check_winner(self):
         """检查是否有玩家获胜"""
-        # 所有可能的获胜组合（行、列、对角线）
-        win_conditions = [
-            [0, 1, 2],
-            [3, 4, 5],
-            [6, 7, 8],  # 行
-            [0, 3, 6],
-            [1, 4, 7],
-            [2, 5, 8],  # 列
-            [0, 4, 8],
-            [2, 4, 6],  # 对角线
-        ]
-
-        for condition in win_conditions:
+        for condition in WIN_CONDITIONS:
             if (
                 self.board[condition[0]]
                 == self.board[condition[1]]
@@ -65,45 +275,101 @@ class TicTacToe:
 
     def minimax(self, board, depth, is_maximizing):
         """Minimax算法实现"""
+        self.nodes += 1
+        key = None
+        if self.table is not None:
+            key = (canonical_key(*to_bits(board)) << 1) | is_maximizing
+            cached = self.table.get(key)
+            if cached is not None:
+                return cached
+
         # 终端状态评估
+        best_score = self.evaluate(board)
+        if best_score == 0 and " " in board:
+            if is_maximizing:
+                best_score = -float("inf")
+                for i in range(9):
+                    if board[i] == " ":
+                        board[i] = "O"
+                        score = self.minimax(board, depth + 1, False)
+                        board[i] = " "
+                        best_score = max(score, best_score)
+            else:
+                best_score = float("inf")
+                for i in range(9):
+                    if board[i] == " ":
+                        board[i] = "X"
+                        score = self.minimax(board, depth + 1, True)
+                        board[i] = " "
+                        best_score = min(score, best_score)
+
+        if key is not None:
+            self.table.put(key, best_score)
+        return best_score
+
+    def probe(self, key, alpha, beta):
+        """查置换表，返回 (可直接返回的得分或 None, alpha, beta)"""
+        entry = self.table.get(key)
+        if entry is not None:
+            flag, value = entry
+            if flag == EXACT:
+                return value, alpha, beta
+            if flag == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value, alpha, beta
+        return None, alpha, beta
+
+    def store(self, key, best_score, alpha, beta):
+        """按搜索窗口 (alpha, beta) 判断边界类型后写入置换表"""
+        if best_score <= alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.put(key, (flag, best_score))
+
+    def negamax(self, board, alpha, beta, player):
+        """带 alpha-beta 剪枝的 negamax，返回待走方 player 的得分"""
+        self.nodes += 1
+        # 只有上一手可能连成一线，此时待走方已输
         if self.evaluate(board) != 0:
-            return self.evaluate(board)
-        elif " " not in board:
+            return -10
+        if " " not in board:
             return 0
 
-        if is_maximizing:
-            best_score = -float("inf")
-            for i in range(9):
-                if board[i] == " ":
-                    board[i] = "O"
-                    score = self.minimax(board, depth + 1, False)
-                    board[i] = " "
-                    best_score = max(score, best_score)
-            return best_score
-        else:
-            best_score = float("inf")
-            for i in range(9):
-                if board[i] == " ":
-                    board[i] = "X"
-                    score = self.minimax(board, depth + 1, True)
-                    board[i] = " "
-                    best_score = min(score, best_score)
-            return best_score
+        key = None
+        alpha0 = alpha
+        if self.table is not None:
+            key = (canonical_key(*to_bits(board)) << 1) | (player == "O") | NEGAMAX_TAG
+            cached, alpha, beta = self.probe(key, alpha, beta)
+            if cached is not None:
+                return cached
+
+        opponent = "X" if player == "O" else "O"
+        best_score = -float("inf")
+        for i in MOVE_ORDER:
+            if board[i] == " ":
+                board[i] = player
+                # 子节点得分回传时会向 0 收缩，窗口两侧各放宽 1
+                score = shrink(-self.negamax(board, -beta - 1, -alpha + 1, opponent))
+                board[i] = " "
+                best_score = max(score, best_score)
+                alpha = max(alpha, score)
+                if alpha >= beta:
+                    self.cutoffs += 1
+                    break
+
+        if key is not None:
+            self.store(key, best_score, alpha0, beta)
+        return best_score
 
     def evaluate(self, board):
         """评估棋盘状态：+10 AI赢，-10 人类赢，0 其他"""
-        win_conditions = [
-            [0, 1, 2],
-            [3, 4, 5],
-            [6, 7, 8],
-            [0, 3, 6],
-            [1, 4, 7],
-            [2, 5, 8],
-            [0, 4, 8],
-            [2, 4, 6],
-        ]
-
-        for condition in win_conditions:
+        for condition in WIN_CONDITIONS:
             if board[condition[0]] == board[condition[1]] == board[condition[2]] == "O":
                 return 10
             elif (
@@ -116,6 +382,27 @@ class TicTacToe:
         """找到最佳落子位置"""
         best_score = -float("inf")
         best_move = None
+        self.nodes = 0
+        self.cutoffs = 0
+
+        if self.use_move_table:
+            move = table_move(*to_bits(self.board))
+            if move is not None:
+                return move
+
+        if self.strategy == "alphabeta":
+            for i in MOVE_ORDER:
+                if self.board[i] == " ":
+                    self.board[i] = "O"
+                    score = shrink(
+                        -self.negamax(self.board, -float("inf"), -best_score + 1, "X")
+                    )
+                    self.board[i] = " "
+
+                    if score > best_score:
+                        best_score = score
+                        best_move = i
+            return best_move
 
         for i in range(9):
             if self.board[i] == " ":
@@ -178,7 +465,180 @@ class TicTacToe:
             self.current_player = "O" if self.current_player == "X" else "X"
 
 
+class BitboardTicTacToe(TicTacToe):
+    """位棋盘版本：每个玩家的棋子存为一个 9 位整数，用预先计算的掩码判断胜负
+
+    棋盘为 [X 的位棋盘, O 的位棋盘]，minimax/evaluate 接收 (x, o) 二元组。
+    """
+
+    PLAYERS = {"X": 0, "O": 1}
+
+    def __init__(self, table=SHARED_TABLE, use_move_table=True, strategy="minimax"):
+        super().__init__(table, use_move_table, strategy)
+        self.board = [0, 0]
+
+    def cell(self, position):
+        """返回指定位置的棋子（"X"、"O" 或空格）"""
+        if self.board[0] & BITS[position]:
+            return "X"
+        if self.board[1] & BITS[position]:
+            return "O"
+        return " "
+
+    def make_move(self, position, player):
+        """在指定位置落子"""
+        bit = BITS[position]
+        if (self.board[0] | self.board[1]) & bit:
+            return False
+        self.board[self.PLAYERS[player]] |= bit
+        return True
+
+    def check_winner(self):
+        """检查是否有玩家获胜"""
+        x, o = self.board
+        for mask in WIN_MASKS:
+            if x & mask == mask:
+                self.winner = "X"
+            elif o & mask == mask:
+                self.winner = "O"
+            else:
+                continue
+            self.game_over = True
+            return True
+
+        # 检查平局
+        if x | o == FULL_MASK:
+            self.game_over = True
+            return True
+
+        return False
+
+    def minimax(self, board, depth, is_maximizing):
+        """Minimax算法实现，board 为 (x, o) 位棋盘"""
+        self.nodes += 1
+        x, o = board
+        key = None
+        if self.table is not None:
+            key = (canonical_key(x, o) << 1) | is_maximizing
+            cached = self.table.get(key)
+            if cached is not None:
+                return cached
+
+        # 终端状态评估
+        occupied = x | o
+        best_score = self.evaluate(board)
+        if best_score == 0 and occupied != FULL_MASK:
+            if is_maximizing:
+                best_score = -float("inf")
+                for bit in BITS:
+                    if not occupied & bit:
+                        score = self.minimax((x, o | bit), depth + 1, False)
+                        best_score = max(score, best_score)
+            else:
+                best_score = float("inf")
+                for bit in BITS:
+                    if not occupied & bit:
+                        score = self.minimax((x | bit, o), depth + 1, True)
+                        best_score = min(score, best_score)
+
+        if key is not None:
+            self.table.put(key, best_score)
+        return best_score
+
+    def negamax(self, board, alpha, beta, player):
+        """带 alpha-beta 剪枝的 negamax，board 为 (x, o) 位棋盘"""
+        self.nodes += 1
+        x, o = board
+        # 只有上一手可能连成一线，此时待走方已输
+        last = x if player == "O" else o
+        for mask in WIN_MASKS:
+            if last & mask == mask:
+                return -10
+        occupied = x | o
+        if occupied == FULL_MASK:
+            return 0
+
+        key = None
+        alpha0 = alpha
+        if self.table is not None:
+            key = (canonical_key(x, o) << 1) | (player == "O") | NEGAMAX_TAG
+            cached, alpha, beta = self.probe(key, alpha, beta)
+            if cached is not None:
+                return cached
+
+        best_score = -float("inf")
+        for i in MOVE_ORDER:
+            bit = BITS[i]
+            if not occupied & bit:
+                if player == "O":
+                    child = self.negamax((x, o | bit), -beta - 1, -alpha + 1, "X")
+                else:
+                    child = self.negamax((x | bit, o), -beta - 1, -alpha + 1, "O")
+                score = shrink(-child)
+                best_score = max(score, best_score)
+                alpha = max(alpha, score)
+                if alpha >= beta:
+                    self.cutoffs += 1
+                    break
+
+        if key is not None:
+            self.store(key, best_score, alpha0, beta)
+        return best_score
+
+    def evaluate(self, board):
+        """评估棋盘状态：+10 AI赢，-10 人类赢，0 其他"""
+        x, o = board
+        for mask in WIN_MASKS:
+            if o & mask == mask:
+                return 10
+            elif x & mask == mask:
+                return -10
+        return 0
+
+    def get_best_move(self):
+        """找到最佳落子位置"""
+        best_score = -float("inf")
+        best_move = None
+        self.nodes = 0
+        self.cutoffs = 0
+        x, o = self.board
+        occupied = x | o
+
+        if self.use_move_table:
+            move = table_move(x, o)
+            if move is not None:
+                return move
+
+        if self.strategy == "alphabeta":
+            for i in MOVE_ORDER:
+                bit = BITS[i]
+                if not occupied & bit:
+                    child = self.negamax(
+                        (x, o | bit), -float("inf"), -best_score + 1, "X"
+                    )
+                    score = shrink(-child)
+
+                    if score > best_score:
+                        best_score = score
+                        best_move = i
+            return best_move
+
+        for i, bit in enumerate(BITS):
+            if not occupied & bit:
+                score = self.minimax((x, o | bit), 0, False)
+
+                if score > best_score:
+                    best_score = score
+                    best_move = i
+
+        return best_move
+
+
 # 运行游戏
 if __name__ == "__main__":
-    game = TicTacToe()
-    game.play()
+    if sys.argv[1:] == ["--build-table"]:
+        count = build_move_table()
+        print(f"已写入 {MOVE_TABLE_PATH}，共 {count} 个局面")
+    else:
+        game = TicTacToe()
+        game.play()
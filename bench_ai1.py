@@ -0,0 +1,119 @@
+"""AI1 井字棋 AI 性能测试：比较不同棋盘后端的搜索速度"""
+
+import os
+import random
+import time
+
+import AI1
+from AI1 import STRATEGIES, BitboardTicTacToe, TicTacToe, TranspositionTable
+
+BACKENDS = {"numpy": TicTacToe, "bitboard": BitboardTicTacToe}
+
+# 测试局面：(名称, 已落子列表)
+POSITIONS = [
+    ("open", []),
+    ("corner", [(0, "X")]),
+    ("center", [(4, "X")]),
+]
+
+
+def bench_search(cls, moves, strategy, repeat=3):
+    """在给定局面上运行 get_best_move，返回 (落子, 对局, 最短用时)"""
+    best_time = float("inf")
+    for _ in range(repeat):
+        game = cls(table=None, use_move_table=False, strategy=strategy)
+        for position, player in moves:
+            game.make_move(position, player)
+        t = time.perf_counter()
+        move = game.get_best_move()
+        best_time = min(best_time, time.perf_counter() - t)
+    return move, game, best_time
+
+
+def bench_table(cls, games=100, seed=0):
+    """AI 对随机对手连续下多局，共享一张置换表，返回 (表, 首局用时, 总用时)"""
+    rng = random.Random(seed)
+    table = TranspositionTable()
+    first = None
+    t = time.perf_counter()
+    for _ in range(games):
+        game = cls(table=table, use_move_table=False)
+        player = "X"
+        while not game.check_winner():
+            if player == "X":
+                empty = [i for i in range(9) if game.cell(i) == " "]
+                game.make_move(rng.choice(empty), "X")
+            else:
+                game.make_move(game.get_best_move(), "O")
+            player = "O" if player == "X" else "X"
+        if first is None:
+            first = time.perf_counter() - t
+    return table, first, time.perf_counter() - t
+
+
+def bench_move_table(cls, games=1000, seed=0):
+    """完美对弈表：返回 (加载用时, 每步平均用时, 每步最大用时)"""
+    if not os.path.exists(AI1.MOVE_TABLE_PATH):
+        AI1.build_move_table()
+    t = time.perf_counter()
+    AI1.MoveTable().lookup(0, 0)
+    startup = time.perf_counter() - t
+
+    rng = random.Random(seed)
+    times = []
+    for _ in range(games):
+        game = cls(table=None)
+        player = "X"
+        while not game.check_winner():
+            if player == "X":
+                empty = [i for i in range(9) if game.cell(i) == " "]
+                game.make_move(rng.choice(empty), "X")
+            else:
+                t = time.perf_counter()
+                move = game.get_best_move()
+                times.append(time.perf_counter() - t)
+                game.make_move(move, "O")
+            player = "O" if player == "X" else "X"
+    return startup, sum(times) / len(times), max(times)
+
+
+def main():
+    print(
+        f"{'position':<10}{'backend':<10}{'strategy':<10}{'move':>6}{'nodes':>10}"
+        f"{'cutoffs':>9}{'time(s)':>10}{'nodes/s':>12}"
+    )
+    for name, moves in POSITIONS:
+        for strategy in STRATEGIES:
+            for backend, cls in BACKENDS.items():
+                move, game, elapsed = bench_search(cls, moves, strategy)
+                print(
+                    f"{name:<10}{backend:<10}{strategy:<10}{move:>6}{game.nodes:>10}"
+                    f"{game.cutoffs:>9}{elapsed:>10.4f}"
+                    f"{game.nodes / elapsed:>12.0f}"
+                )
+
+    print()
+    print(
+        f"{'backend':<10}{'games':>6}{'entries':>9}{'hit rate':>10}"
+        f"{'first(s)':>10}{'total(s)':>10}"
+    )
+    for backend, cls in BACKENDS.items():
+        games = 100
+        table, first, total = bench_table(cls, games)
+        print(
+            f"{backend:<10}{games:>6}{len(table):>9}{table.hit_rate():>10.1%}"
+            f"{first:>10.4f}{total:>10.4f}"
+        )
+
+    print()
+    print(f"{'backend':<10}{'load(ms)':>10}{'mean(ms)':>10}{'max(ms)':>10}")
+    for backend, cls in BACKENDS.items():
+        startup, mean, worst = bench_move_table(cls)
+        print(
+            f"{backend:<10}{startup * 1e3:>10.4f}{mean * 1e3:>10.4f}"
+            f"{worst * 1e3:>10.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""gobangAI 性能测试：先校验增量评估与 eval_board 一致，再比较用时"""
+
+import io
+import random
+import time
+
+import numpy as np
+
+import gobangAI as g
+import gobang_engine
+
+# 已知必胜局面：(名称, ME 的子, OPP 的子, 是否只需 VCF, ME 的必胜着法)
+FORCED_WINS = [
+    (
+        "five",
+        [(1, 1), (2, 2), (3, 3), (4, 4)],
+        [(0, 0), (1, 2), (2, 3)],
+        True,
+        {(5, 5)},
+    ),
+    (
+        "double four",
+        [(2, 2), (2, 3), (2, 4), (3, 5), (4, 5), (5, 5)],
+        [(2, 1), (6, 5), (0, 0), (7, 7), (1, 6)],
+        True,
+        {(2, 5)},
+    ),
+    (
+        "three fours",
+        [(1, 4), (2, 7), (3, 1), (4, 4), (5, 4), (7, 2), (7, 5)],
+        [(1, 0), (1, 3), (3, 3), (3, 6), (4, 1), (4, 7), (6, 1), (6, 3)],
+        True,
+        {(3, 4)},
+    ),
+    (
+        "double three",
+        [(2, 2), (2, 3), (3, 4), (4, 4)],
+        [(0, 0), (7, 7), (0, 7), (7, 0)],
+        False,
+        {(2, 4)},
+    ),
+]
+
+
+def forced_win_board(me, opp, size=None):
+    size = size or g.SIZE
+    b = np.zeros((size, size), dtype=int)
+    for x, y in me:
+        b[x, y] = g.ME
+    for x, y in opp:
+        b[x, y] = g.OPP
+    return b
+
+
+def check_forced_wins():
+    """已知必胜局面上威胁搜索必须找到必胜序列，ai_move 必须走出必胜着法"""
+    for name, me, opp, vcf, winning in FORCED_WINS:
+        b = forced_win_board(me, opp)
+        assert bool(g.find_forced_win(b, vct_depth=0)) == vcf, name
+        line = g.find_forced_win(b)
+        assert line and line[0] in winning, name
+        assert g.ai_move(b.copy(), tt=None, use_book=False) in winning, name
+        assert (
+            g.ai_move(g.BitBoard.from_array(b), tt=None, use_book=False) in winning
+        ), name
+
+
+def full_board_lines(size):
+    """没有五连的满盘，按 BOARD 命令的 x,y,field 格式"""
+    return [f"{x},{y},{1 + (x // 2 + y) % 2}" for x in range(size) for y in range(size)]
+
+
+def check_engine():
+    """gobang_engine 脚本会话：满盘、非法坐标都回复 ERROR，之后引擎仍能正常对局"""
+    script = [
+        "START 5",
+        "INFO timeout_turn 100",
+        "BOARD",
+        *full_board_lines(5),
+        "DONE",
+        "TURN 9,9",
+        "TURN a,b",
+        "RESTART",
+        "TURN 2,2",
+        "ABOUT",
+        "END",
+    ]
+    out = io.StringIO()
+    gobang_engine.main(io.StringIO("\n".join(script) + "\n"), out)
+    replies = [r for r in out.getvalue().splitlines() if not r.startswith("MESSAGE")]
+    assert replies[0] == "OK", replies
+    assert replies[1] == "ERROR 棋盘已满", replies
+    assert replies[2].startswith("ERROR 坐标越界"), replies
+    assert replies[3].startswith("ERROR 无法解析坐标"), replies
+    assert replies[4] == "OK", replies
+    x, y = map(int, replies[5].split(","))
+    assert 0 <= x < 5 and 0 <= y < 5 and (x, y) != (2, 2), replies
+    assert replies[6] == gobang_engine.ABOUT, replies
+    return replies
+
+
+def random_boards(n, seed=0, max_stones=30, min_stones=0, size=None):
+    """随机生成 n 个双方交替落子的棋盘"""
+    rng = random.Random(seed)
+    size = size or g.SIZE
+    cells = [(x, y) for x in range(size) for y in range(size)]
+    boards = []
+    for _ in range(n):
+        b = np.zeros((size, size), dtype=int)
+        for i, (x, y) in enumerate(
+            rng.sample(cells, rng.randint(min_stones, max_stones))
+        ):
+            b[x, y] = g.OPP if i % 2 == 0 else g.ME
+        boards.append(b)
+    return boards
+
+
+def check_incremental(boards, seed=0, steps=6):
+    """差分校验：随机落子、悔棋后 Position.score 必须等于 eval_board"""
+    rng = random.Random(seed)
+    for b in boards:
+        pos = g.Position(b.copy())
+        assert pos.score == g.eval_board(pos.b)
+        for _ in range(steps):
+            empty = list(zip(*np.nonzero(pos.b == g.EMPTY)))
+            if not empty:
+                break
+            x, y = rng.choice(empty)
+            pos.play(x, y, rng.choice((g.ME, g.OPP)))
+            assert pos.score == g.eval_board(pos.b)
+        while pos.history:
+            pos.undo()
+            assert pos.score == g.eval_board(pos.b)
+        assert (pos.b == b).all()
+
+
+def bench_eval(boards, seed=0):
+    """返回 (eval_board 每次用时, 增量评估每次落子+悔棋用时)"""
+    t = time.perf_counter()
+    for b in boards:
+        g.eval_board(b)
+    full = (time.perf_counter() - t) / len(boards)
+
+    rng = random.Random(seed)
+    positions = [g.Position(b.copy()) for b in boards]
+    updates = 0
+    t = time.perf_counter()
+    for pos in positions:
+        for x, y in zip(*np.nonzero(pos.b == g.EMPTY)):
+            if rng.random() < 0.25:
+                pos.play(x, y, g.ME)
+                pos.undo()
+                updates += 1
+    incremental = (time.perf_counter() - t) / updates
+    return full, incremental
+
+
+def bench_vectorized(size, n=50, batch=200):
+    """在 size 路棋盘上比较 eval_board 与向量化评估，返回每个棋盘的用时 (逐格, 单个, 批量)"""
+    boards = random_boards(n, seed=size, max_stones=size * size // 3, size=size)
+    saved, g.SIZE = g.SIZE, size  # eval_board 按全局 SIZE 扫描
+    try:
+        t = time.perf_counter()
+        expected = [g.eval_board(b) for b in boards]
+        loop = (time.perf_counter() - t) / n
+    finally:
+        g.SIZE = saved
+
+    t = time.perf_counter()
+    single = [g.eval_board_np(b) for b in boards]
+    single_time = (time.perf_counter() - t) / n
+    assert single == expected
+
+    stacked = np.stack((boards * (batch // n + 1))[:batch])
+    t = time.perf_counter()
+    batched = g.eval_boards_np(stacked)
+    batch_time = (time.perf_counter() - t) / batch
+    assert list(batched[:n]) == expected
+    return loop, single_time, batch_time
+
+
+def bench_bitboard(size, n=50, time_ms=500):
+    """位棋盘在 size 路上的用时：每次调用微秒数 (score, is_win, moves) 与搜索节点速度"""
+    boards = random_boards(n, seed=size, max_stones=size * 2, min_stones=2, size=size)
+    bbs = [g.BitBoard.from_array(b) for b in boards]
+    for b, bb in zip(boards, bbs):
+        assert bb.score == g.eval_board_np(b)
+    timings = []
+    for fn in (
+        lambda bb: bb.score,
+        lambda bb: bb.is_win(g.ME) or bb.is_win(g.OPP),
+        lambda bb: bb.moves(),
+    ):
+        t = time.perf_counter()
+        for bb in bbs:
+            fn(bb)
+        timings.append((time.perf_counter() - t) / n)
+    info = {}
+    g.ai_move(bbs[0], max_depth=None, time_ms=time_ms, info=info, use_book=False)
+    return timings, info
+
+
+def bench_win(boards):
+    """返回 (is_win 双方全盘扫描每次用时, win_at 每次用时)"""
+    t = time.perf_counter()
+    for b in boards:
+        g.is_win(b, g.ME) or g.is_win(b, g.OPP)
+    full = (time.perf_counter() - t) / len(boards)
+
+    calls = 0
+    t = time.perf_counter()
+    for b in boards:
+        grid = b.tolist()
+        for x, y in zip(*np.nonzero(b)):
+            g.win_at(grid, x, y)
+            calls += 1
+    return full, (time.perf_counter() - t) / calls
+
+
+def bench_moves(boards):
+    """返回 (moves 从头计算每次用时, 增量候选集每次用时)"""
+    boards = [b for b in boards if b.any()]
+    t = time.perf_counter()
+    for b in boards:
+        g.moves(b)
+    fresh = (time.perf_counter() - t) / len(boards)
+
+    positions = [g.Position(b.copy()) for b in boards]
+    t = time.perf_counter()
+    for pos in positions:
+        pos.cand.moves()
+    return fresh, (time.perf_counter() - t) / len(positions)
+
+
+def bench_tt(boards, depth=3):
+    """返回 (不用置换表用时, 用置换表用时, 置换表统计)"""
+    t = time.perf_counter()
+    for b in boards:
+        g.ai_move(b.copy(), max_depth=depth, tt=None, use_book=False)
+    plain = time.perf_counter() - t
+
+    tt = g.TranspositionTable()
+    t = time.perf_counter()
+    for b in boards:
+        g.ai_move(b.copy(), max_depth=depth, tt=tt, use_book=False)
+    return plain, time.perf_counter() - t, tt.stats()
+
+
+def bench_budget(boards, time_ms=500):
+    """按时间预算搜索，返回每个局面的 (完成深度, 用时毫秒, 节点数)"""
+    results = []
+    for b in boards:
+        info = {}
+        g.ai_move(b.copy(), max_depth=None, time_ms=time_ms, info=info, use_book=False)
+        results.append((info["depth"], info["time_ms"], info["nodes"]))
+    return results
+
+
+def bench_threats(boards, max_nodes=g.VCF_NODES):
+    """威胁搜索在随机局面上的用时：返回 (每局面毫秒, 每局面节点数, 找到必胜的局面数)"""
+    nodes = found = 0
+    t = time.perf_counter()
+    for b in boards:
+        solver = g.ThreatSolver(b, max_nodes)
+        found += solver.vct(g.ME) is not None
+        nodes += solver.nodes
+    elapsed = time.perf_counter() - t
+    return elapsed / len(boards) * 1000, nodes / len(boards), found
+
+
+def check_parallel_deterministic(boards, depth=3):
+    """workers=1 的 ai_move_parallel 结果不受之前 ai_move 用过的全局置换表影响"""
+    for b in boards:
+        info = {}
+        move = g.ai_move_parallel(b.copy(), max_depth=depth, workers=1, info=info)
+        g.ai_move(b.copy(), max_depth=depth + 1, use_book=False)
+        again = {}
+        repeat = g.ai_move_parallel(b.copy(), max_depth=depth, workers=1, info=again)
+        assert (repeat, again["score"]) == (move, info["score"]), b
+    return len(boards)
+
+
+def bench_parallel(boards, depth=4, workers=(1, 2, 4, 8)):
+    """多进程根节点并行的扩展性：返回 [(进程数, 用时, 节点数, 着法列表)]"""
+    results = []
+    for n in workers:
+        g.ai_move_parallel(boards[0].copy(), max_depth=1, workers=n)  # 预热进程池
+        moves, nodes = [], 0
+        t = time.perf_counter()
+        for b in boards:
+            info = {}
+            moves.append(
+                g.ai_move_parallel(
+                    b.copy(), max_depth=depth, workers=n, info=info, use_tt=False
+                )
+            )
+            nodes += info["nodes"]
+        results.append((n, time.perf_counter() - t, nodes, moves))
+    return results
+
+
+def main():
+    boards = random_boards(200)
+    check_incremental(boards)
+    print(f"incremental eval matches eval_board on {len(boards)} boards")
+
+    check_engine()
+    print("engine answers ERROR on a full board and bad moves and keeps running")
+
+    check_forced_wins()
+    print(f"threat search solves {len(FORCED_WINS)} known forced wins")
+    ms, nodes, found = bench_threats(boards[:50])
+    print(
+        f"{'find_forced_win':<20}{ms:10.2f} ms/call  {nodes:8.0f} nodes  {found} wins"
+    )
+
+    full, incremental = bench_eval(boards[:50])
+    print(f"{'eval_board':<20}{full * 1e6:10.1f} us/call")
+    print(f"{'Position.play+undo':<20}{incremental * 1e6:10.1f} us/call")
+
+    for size in (8, 15, 19):
+        loop, single, batched = bench_vectorized(size)
+        print(
+            f"{'eval size ' + str(size):<20}eval_board {loop * 1e6:9.1f} us  "
+            f"np {single * 1e6:8.1f} us  np batch {batched * 1e6:8.1f} us/board"
+        )
+
+    for size in (8, 15, 19):
+        (score, win, gen), info = bench_bitboard(size)
+        print(
+            f"{'bitboard ' + str(size):<20}score {score * 1e6:7.1f} us  "
+            f"is_win {win * 1e6:6.1f} us  moves {gen * 1e6:6.1f} us  "
+            f"search depth {info['depth']} "
+            f"{info['nodes'] / info['time_ms'] * 1000:8.0f} nodes/s"
+        )
+
+    full, last = bench_win(boards[:50])
+    print(f"{'is_win x2':<20}{full * 1e6:10.1f} us/call")
+    print(f"{'win_at':<20}{last * 1e6:10.1f} us/call")
+
+    fresh, incremental = bench_moves(boards[:50])
+    print(f"{'moves':<20}{fresh * 1e6:10.1f} us/call")
+    print(f"{'CandidateSet.moves':<20}{incremental * 1e6:10.1f} us/call")
+
+    boards = random_boards(4, seed=1, max_stones=12, min_stones=2)
+    plain, cached, stats = bench_tt(boards)
+    print(f"{'ai_move no tt':<20}{plain:10.2f} s")
+    print(f"{'ai_move tt':<20}{cached:10.2f} s  {stats}")
+
+    for depth, elapsed, nodes in bench_budget(boards):
+        print(
+            f"{'ai_move 500ms':<20}depth {depth:3d}  {elapsed:8.1f} ms  "
+            f"{nodes / elapsed * 1000:10.0f} nodes/s"
+        )
+
+    count = check_parallel_deterministic(boards)
+    print(f"ai_move_parallel workers=1 is deterministic on {count} boards")
+
+    results = bench_parallel(boards)
+    base = results[0][1]
+    for n, elapsed, nodes, moves in results:
+        print(
+            f"{'parallel ' + str(n):<20}{elapsed:8.2f} s  speedup {base / elapsed:5.2f}"
+            f"  {nodes / elapsed:10.0f} nodes/s  same moves {moves == results[0][3]}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""gobangAI 基准测试套件：固定局面上测量各函数用时、各深度 ai_move 的节点速度和内存峰值
+
+    python bench_gobang_suite.py --out result.json           # 输出 JSON
+    python bench_gobang_suite.py --save bench_baseline.json  # 保存为基线
+    python bench_gobang_suite.py --compare bench_baseline.json --threshold 0.2
+
+--compare 时任一指标比基线差超过 threshold（相对值）即以退出码 1 结束。
+比较前用时和速度指标先按两次运行中固定纯 Python 负载的用时（calibration）折算，
+以抵消机器快慢的差别；内存指标直接比较。
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import gobangAI as g
+from bench_gobang import FORCED_WINS, forced_win_board
+
+# 固定局面：(名称, OPP 先手起交替落子的着法序列)
+POSITIONS = [
+    ("opening", [(3, 4), (4, 4), (4, 3)]),
+    (
+        "midgame",
+        [
+            (3, 4), (2, 5), (3, 5), (2, 6), (3, 6), (4, 5), (2, 4), (1, 5),
+            (4, 4), (1, 6), (2, 7), (1, 4), (4, 6), (3, 7), (1, 7), (0, 6),
+        ],
+    ),
+]  # fmt: skip
+TACTICAL = ("three fours", "double three")  # 取自 bench_gobang.FORCED_WINS
+MAX_DEPTH = 4
+REPEAT = 5  # 取多次测量中的最小值以降低噪声
+MIN_SECONDS = 0.05  # 每次测量至少持续的时间，过快的函数自动增加调用次数
+THRESHOLD = 0.2
+
+# 指标名后缀 -> 是否越大越好；不在表中的指标（节点数、完成深度）只记录不比较
+DIRECTIONS = {"_us": False, "_ms": False, "_kb": False, "nodes_per_s": True}
+# 随机器速度变化、需要按 calibration 折算的指标后缀；内存（_kb）直接比较
+SCALED = ("_us", "_ms", "nodes_per_s")
+
+
+def suite_positions():
+    """[(名称, 棋盘)]：开局、中局和战术（必胜）局面"""
+    positions = []
+    for name, seq in POSITIONS:
+        b = np.zeros((g.SIZE, g.SIZE), dtype=int)
+        for i, (x, y) in enumerate(seq):
+            b[x, y] = g.OPP if i % 2 == 0 else g.ME
+        positions.append((name, b))
+    for name, me, opp, _, _ in FORCED_WINS:
+        if name in TACTICAL:
+            positions.append(("tactical " + name, forced_win_board(me, opp)))
+    return positions
+
+
+def per_call_us(fn, repeat=REPEAT):
+    """fn 每次调用的最短平均用时（微秒）"""
+    t = time.perf_counter()
+    fn()
+    calls = max(1, int(MIN_SECONDS / max(time.perf_counter() - t, 1e-7)))
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, (time.perf_counter() - t) / calls)
+    return best * 1e6
+
+
+def calibration_loop():
+    """固定的纯 Python 负载，用来衡量机器当前的速度"""
+    total = 0
+    for i in range(20000):
+        total += i * i % 7
+    return total
+
+
+def search_metrics(b, depth, repeat=REPEAT):
+    """空置换表下 ai_move 搜到 depth 层：最短用时、节点数、节点速度、实际完成的深度
+
+    关闭威胁搜索（vcf_nodes=0），否则战术局面上预先的 VCF/VCT 直接找到必胜，
+    根本不进入主搜索；威胁搜索单独以 find_forced_win_us 测量。
+    至少运行 repeat 次且累计 MIN_SECONDS 秒，取用时最短的一次。
+    """
+    best, runs, total = None, 0, 0.0
+    while runs < repeat or total < MIN_SECONDS * 1000:
+        info = {}
+        g.ai_move(
+            b.copy(),
+            max_depth=depth,
+            tt=g.TranspositionTable(),
+            info=info,
+            vcf_nodes=0,
+            use_book=False,
+        )
+        if best is None or info["time_ms"] < best["time_ms"]:
+            best = info
+        runs += 1
+        total += info["time_ms"]
+    return {
+        "time_ms": best["time_ms"],
+        "nodes": best["nodes"],
+        "nodes_per_s": best["nodes"] / max(best["time_ms"], 1e-3) * 1000,
+        "depth": best["depth"],
+    }
+
+
+def peak_kb(b, depth):
+    """ai_move 搜到 depth 层时 tracemalloc 记录的内存峰值（KB）"""
+    tracemalloc.start()
+    try:
+        g.ai_move(
+            b.copy(),
+            max_depth=depth,
+            tt=g.TranspositionTable(),
+            vcf_nodes=0,
+            use_book=False,
+        )
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run(max_depth=MAX_DEPTH):
+    """运行整个套件，返回 {"meta": ..., "metrics": {指标名: 值}}"""
+    metrics = {}
+    calibration = per_call_us(calibration_loop)
+    for name, b in suite_positions():
+        metrics[f"{name}.eval_board_us"] = per_call_us(lambda: g.eval_board(b))
+        metrics[f"{name}.moves_us"] = per_call_us(lambda: g.moves(b))
+        metrics[f"{name}.is_win_us"] = per_call_us(
+            lambda: g.is_win(b, g.ME) or g.is_win(b, g.OPP)
+        )
+        metrics[f"{name}.find_forced_win_us"] = per_call_us(
+            lambda: g.find_forced_win(b)
+        )
+        for depth in range(1, max_depth + 1):
+            for key, value in search_metrics(b, depth).items():
+                metrics[f"{name}.ai_move.d{depth}.{key}"] = value
+        metrics[f"{name}.ai_move.peak_kb"] = peak_kb(b, max_depth)
+    calibration = min(calibration, per_call_us(calibration_loop))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "size": g.SIZE,
+            "max_depth": max_depth,
+            "calibration_us": calibration,
+        },
+        "metrics": metrics,
+    }
+
+
+def higher_is_better(metric):
+    for suffix, higher in DIRECTIONS.items():
+        if metric.endswith(suffix):
+            return higher
+    return None
+
+
+def compare(result, baseline, threshold=THRESHOLD):
+    """返回 [(指标, 基线值, 当前值, 相对变化)]，只包含变差超过 threshold 的指标
+
+    用时和速度指标（SCALED）先按 calibration 折算到基线机器的速度，内存指标不折算。
+    """
+    scale = result["meta"]["calibration_us"] / baseline["meta"]["calibration_us"]
+    regressions = []
+    for metric, base in baseline["metrics"].items():
+        higher = higher_is_better(metric)
+        if higher is None or metric not in result["metrics"] or not base:
+            continue
+        value = result["metrics"][metric]
+        if metric.endswith(SCALED):
+            value = value * scale if higher else value / scale
+        change = (value - base) / base
+        if (-change if higher else change) > threshold:
+            regressions.append((metric, base, value, change))
+    return regressions
+
+
+def check_compare():
+    """compare 的自检：用时按 calibration 折算，内存不折算"""
+
+    def run_of(calibration, **metrics):
+        return {"meta": {"calibration_us": calibration}, "metrics": metrics}
+
+    baseline = run_of(100.0, **{"x.eval_us": 10.0, "x.ai_move.peak_kb": 1000.0})
+    # 机器快一倍：用时减半、内存不变，都不算退化
+    assert not compare(
+        run_of(50.0, **{"x.eval_us": 5.0, "x.ai_move.peak_kb": 1000.0}), baseline
+    )
+    # 机器慢一倍：用时翻倍不算退化，内存涨到 1900 kB 要报出来
+    regressions = compare(
+        run_of(200.0, **{"x.eval_us": 20.0, "x.ai_move.peak_kb": 1900.0}), baseline
+    )
+    assert [r[0] for r in regressions] == ["x.ai_move.peak_kb"], regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depth", type=int, default=MAX_DEPTH)
+    parser.add_argument("--out", help="结果 JSON 的路径，默认打印到标准输出")
+    parser.add_argument("--save", metavar="PATH", help="把结果保存为基线")
+    parser.add_argument("--compare", metavar="PATH", help="与基线比较")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args(argv)
+
+    result = run(args.depth)
+    text = json.dumps(result, indent=1, sort_keys=True)
+    for path in (args.out, args.save):
+        if path:
+            with open(path, "w") as f:
+                f.write(text)
+    if not (args.out or args.save or args.compare):
+        print(text)
+    if args.compare:
+        check_compare()
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.threshold)
+        for metric, base, value, change in regressions:
+            print(
+                f"REGRESSION {metric:<45}{base:12.1f} -> {value:12.1f} ({change:+.0%})"
+            )
+        print(f"{len(regressions)} regressions over {args.threshold:.0%}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""Ultimate 井字棋引擎性能测试：走子/悔棋、合法着法生成、复制与哈希的吞吐量，以及 AI 的速度与棋力
+
+python bench_ultimate.py           # 引擎吞吐量 + MCTS、alpha-beta 的速度与对局胜率
+python bench_ultimate.py --games 0 # 跳过对局
+python bench_ultimate.py --workers 1 2 4 8  # 根并行 MCTS 的进程数，不给数值则跳过
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+
+import numpy as np
+
+import ultimate_batch
+from ultimate_ai import (
+    AB_TIME_MS,
+    MCTS_TIME_MS,
+    AlphaBetaPlayer,
+    MCTSPlayer,
+    ParallelMCTSPlayer,
+    playout,
+)
+from ultimate_engine import RED, BLUE, TIE, UltimateBoard
+
+GAMES = 20
+BATCH_SIZES = (1000, 10000, 100000)
+CHECK_POSITIONS = 20  # 与逐局模拟对比的局面数
+CHECK_GAMES = 2000  # 每个局面各模拟的局数
+WORKERS = (1, 2, 4)
+STANDARD_PLIES = (0, 10, 20, 40)  # 标准局面：同一盘随机对局下到这些手数时的局面
+
+
+def sample_positions(n=1000, seed=0):
+    """随机对局中途的局面（每局随机停在某一手）"""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < n:
+        board = UltimateBoard()
+        stop = rng.randint(0, 60)
+        while board.winner is None and len(board.history) < stop:
+            board.make(rng.choice(board.legal_moves()))
+        if board.winner is None:
+            positions.append(board)
+    return positions
+
+
+def standard_positions(plies=STANDARD_PLIES, seed=1):
+    """[(名称, 局面)]：取第一盘长度超过 max(plies) 的随机对局，在各手数处截取"""
+    rng = random.Random(seed)
+    while True:
+        board = UltimateBoard()
+        snapshots = []
+        while board.winner is None and len(board.history) <= max(plies):
+            if len(board.history) in plies:
+                snapshots.append((f"ply {len(board.history)}", board.copy()))
+            board.make(rng.choice(board.legal_moves()))
+        if len(snapshots) == len(plies):
+            return snapshots
+
+
+def bench_playouts(games=2000, seed=0):
+    """随机下完整局，返回 (每秒局数, 每秒走子数)"""
+    rng = random.Random(seed)
+    moves = 0
+    t = time.perf_counter()
+    for _ in range(games):
+        board = UltimateBoard()
+        while board.winner is None:
+            board.make(rng.choice(board.legal_moves()))
+        moves += len(board.history)
+    elapsed = time.perf_counter() - t
+    return games / elapsed, moves / elapsed
+
+
+def bench_make_unmake(positions):
+    """每个局面上所有合法着法各走一次再悔棋，返回每秒 make+unmake 次数"""
+    pairs = 0
+    t = time.perf_counter()
+    for board in positions:
+        for cell in board.legal_moves():
+            board.make(cell)
+            board.unmake()
+            pairs += 1
+    return pairs / (time.perf_counter() - t)
+
+
+def per_second(fn, positions, repeat=10):
+    t = time.perf_counter()
+    for _ in range(repeat):
+        for board in positions:
+            fn(board)
+    return repeat * len(positions) / (time.perf_counter() - t)
+
+
+def bench_fast_playouts(games=2000, seed=0):
+    """ultimate_ai.playout（MCTS 使用的随机走子）每秒下完的局数"""
+    rng = random.Random(seed)
+    t = time.perf_counter()
+    for _ in range(games):
+        playout(UltimateBoard(), rng)
+    return games / (time.perf_counter() - t)
+
+
+def bench_batch(sizes=BATCH_SIZES, seed=0):
+    """空棋盘起 ultimate_batch.playouts 同步下完 n 局的每秒局数"""
+    arrays = ultimate_batch.from_boards([UltimateBoard()])
+    for n in sizes:
+        t = time.perf_counter()
+        ultimate_batch.playouts(*arrays, games=n, rng=seed)
+        yield n, n / (time.perf_counter() - t)
+
+
+def check_batch(positions, games=CHECK_GAMES, seed=0):
+    """批量模拟与逐局 playout 的结果分布是否一致，返回各局面卡方检验的 p 值
+
+    每个局面上两边各下 games 局，对 (RED 胜, BLUE 胜, 和棋) 做 2x3 列联表检验，
+    自由度为 2 时 p = exp(-chi2 / 2)。缺失的结果列不计入自由度。
+    """
+    batch = ultimate_batch.playouts(
+        *ultimate_batch.from_boards(positions), games=games, rng=seed
+    )
+    rng = random.Random(seed)
+    p_values = []
+    for board, counts in zip(positions, batch):
+        scalar = [0, 0, 0]
+        for _ in range(games):
+            scalar[(RED, BLUE, TIE).index(playout(board.copy(), rng))] += 1
+        table = np.array([counts, scalar], dtype=float)
+        table = table[:, table.sum(axis=0) > 0]
+        expected = table.sum(axis=1, keepdims=True) * table.sum(axis=0) / table.sum()
+        chi2 = ((table - expected) ** 2 / expected).sum()
+        df = table.shape[1] - 1
+        p_values.append(
+            math.exp(-chi2 / 2) if df == 2 else math.erfc(chi2**0.5 / 2**0.5)
+        )
+    return p_values
+
+
+def bench_mcts(positions, time_ms=MCTS_TIME_MS):
+    """各局面上 MCTS 思考 time_ms 的平均每秒模拟次数"""
+    rates = []
+    for board in positions:
+        player = MCTSPlayer(time_ms=time_ms, seed=0)
+        player.choose(board)
+        rates.append(player.last["playouts_per_s"])
+    return sum(rates) / len(rates)
+
+
+def play_game(red, blue, rng):
+    """red、blue 为有 choose(board) 的 AI，None 表示随机落子；返回胜者"""
+    board = UltimateBoard()
+    while board.winner is None:
+        player = red if board.player == RED else blue
+        if player is None:
+            board.make(rng.choice(board.legal_moves()))
+        else:
+            board.make(player.choose(board))
+    return board.winner
+
+
+def match(make_a, make_b, games, seed=0):
+    """a、b 轮流执红先手各下 games 局，返回 a 的 (胜, 和, 负)"""
+    rng = random.Random(seed)
+    wins = draws = 0
+    for n in range(games):
+        a, b = make_a(), make_b()
+        a_color = RED if n % 2 == 0 else BLUE
+        winner = play_game(a, b, rng) if a_color == RED else play_game(b, a, rng)
+        wins += winner == a_color
+        draws += winner == TIE
+    return wins, draws, games - wins - draws
+
+
+def bench_strength(games=GAMES, time_ms=MCTS_TIME_MS):
+    """MCTS（每步 time_ms）对随机落子和对每步 time_ms/10 的 MCTS 的战绩"""
+    print(f"strength at {time_ms} ms/move, {games} games each (W/D/L):")
+    for name, make_b in (
+        ("random", lambda: None),
+        (f"mcts {time_ms // 10} ms", lambda: MCTSPlayer(time_ms=time_ms // 10)),
+    ):
+        t = time.perf_counter()
+        w, d, l = match(lambda: MCTSPlayer(time_ms=time_ms), make_b, games)
+        elapsed = time.perf_counter() - t
+        print(
+            f"  vs {name:<16}{w:4d}{d:4d}{l:4d}   {(w + d / 2) / games:6.1%}"
+            f"   {elapsed:.0f}s"
+        )
+
+
+def bench_parallel(positions, games=GAMES, time_ms=MCTS_TIME_MS, workers=WORKERS):
+    """根并行 MCTS 的扩展性：各进程数下的每秒模拟数，以及与单进程 MCTS 同样每步 time_ms 的战绩"""
+    print(f"root-parallel mcts at {time_ms} ms/move, {os.cpu_count()} cpus (W/D/L):")
+    for n in workers:
+        player = ParallelMCTSPlayer(workers=n, time_ms=time_ms)
+        try:
+            player.choose(UltimateBoard())  # 启动进程池
+            rates = []
+            for board in positions:
+                player.choose(board)
+                rates.append(player.last["playouts_per_s"])
+            line = f"  workers {n:<4}{sum(rates) / len(rates):12.0f} playouts/s"
+            if games:
+                w, d, l = match(
+                    lambda: player, lambda: MCTSPlayer(time_ms=time_ms), games
+                )
+                line += f"{w:6d}{d:4d}{l:4d}   {(w + d / 2) / games:6.1%}"
+            print(line)
+        finally:
+            player.close()
+
+
+def bench_alphabeta(games=GAMES, time_ms=AB_TIME_MS, mcts_ms=MCTS_TIME_MS):
+    """标准局面上 alpha-beta 思考 time_ms 的节点速度与完成深度，以及每步 mcts_ms 时对 MCTS 的战绩"""
+    print(f"alphabeta at {time_ms} ms/move:")
+    for name, board in standard_positions():
+        player = AlphaBetaPlayer(time_ms=time_ms)
+        player.choose(board)
+        last = player.last
+        print(
+            f"  {name:<18}{last['nodes_per_s']:12.0f} nodes/s   depth {last['depth']:<3}"
+            f"{last['nodes']:10d} nodes"
+        )
+    if games:
+        w, d, l = match(
+            lambda: AlphaBetaPlayer(time_ms=mcts_ms),
+            lambda: MCTSPlayer(time_ms=mcts_ms),
+            games,
+        )
+        print(
+            f"  vs mcts at {mcts_ms} ms/move{w:4d}{d:4d}{l:4d}"
+            f"   {(w + d / 2) / games:6.1%}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=GAMES, help="每组对局数")
+    parser.add_argument("--time-ms", type=int, default=MCTS_TIME_MS)
+    parser.add_argument("--ab-time-ms", type=int, default=AB_TIME_MS)
+    parser.add_argument(
+        "--workers", type=int, nargs="*", default=WORKERS, help="根并行测试的进程数"
+    )
+    args = parser.parse_args(argv)
+
+    positions = sample_positions()
+    games, moves = bench_playouts()
+    print(f"{'random playouts':<20}{games:12.0f} games/s{moves:12.0f} moves/s")
+    print(f"{'fast playouts':<20}{bench_fast_playouts():12.0f} games/s")
+    print(f"{'make+unmake':<20}{bench_make_unmake(positions):12.0f} /s")
+    for name, fn in (
+        ("legal_moves", UltimateBoard.legal_moves),
+        ("copy", UltimateBoard.copy),
+        ("hash", UltimateBoard.hash),
+    ):
+        print(f"{name:<20}{per_second(fn, positions):12.0f} /s")
+    for n, rate in bench_batch():
+        print(f"{'batch playouts':<20}{rate:12.0f} games/s  N={n}")
+    p_values = check_batch(positions[:CHECK_POSITIONS])
+    print(
+        f"{'batch vs scalar':<20}{min(p_values):12.3f} min p"
+        f"  {sum(p < 0.01 for p in p_values)}/{len(p_values)} positions p<0.01"
+    )
+    rate = bench_mcts(positions[:20], args.time_ms)
+    print(f"{'mcts playouts':<20}{rate:12.0f} /s")
+    if args.games:
+        bench_strength(args.games, args.time_ms)
+    bench_alphabeta(args.games, args.ab_time_ms, args.time_ms)
+    if args.workers:
+        bench_parallel(positions[:20], args.games, args.time_ms, args.workers)
+
+
+if __name__ == "__main__":
+    main()
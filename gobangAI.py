@@ -1,9 +1,15 @@
-import numpy as np, time, random, sys
+import numpy as np, time, random, sys, functools, hashlib, os, threading, tempfile
+from concurrent.futures import ProcessPoolExecutor
+from numpy.lib.stride_tricks import sliding_window_view
 
 SIZE = 8
 WIN = 5
 EMPTY, ME, OPP = 0, 1, 2
 DIRS = [(1, 0), (0, 1), (1, 1), (1, -1)]
+RADIUS = 2  # 候选着法：离已有棋子的切比雪夫距离不超过 RADIUS 的空格
+MAX_MOVES = 20  # 每个节点最多展开的候选数
+THINK_MS = 2000  # CLI 中 AI 每步的思考时间（毫秒）
+PONDER_MOVES = 4  # CLI 中对手思考时预先搜索的对手着法数
 
 
 def in_bounds(x, y):
@@ -38,6 +44,8 @@ def pattern_score(line):
 
 
 def eval_board(b):
+    if isinstance(b, BitBoard):
+        return b.score
     score = 0
     for dx, dy in DIRS:
         for x in range(SIZE):
@@ -51,7 +59,280 @@ def eval_board(b):
     return score
 
 
+# ── 三进制窗口打分表：长度 L (1..9) 的窗口编码为 Σ cell[k]·3^k，
+#    在表中的下标为 WINDOW_OFFSET[L] + 编码，值为该窗口的 pattern_score
+POW3 = [3**k for k in range(64)]
+WINDOW_OFFSET = [sum(POW3[1:length]) for length in range(10)]
+PATTERN_TABLE_SIZE = WINDOW_OFFSET[9] + POW3[9]
+# 打分表的磁盘缓存目录，可用环境变量 GOBANG_CACHE_DIR 指定
+PATTERN_TABLE_DIR = os.environ.get("GOBANG_CACHE_DIR") or os.path.join(
+    os.path.expanduser("~"), ".cache", "gobangAI"
+)
+_pattern_tables = {}  # PATTERN_SCORE 签名 -> 打分表
+
+
+def pattern_signature():
+    return hashlib.sha1(repr(sorted(PATTERN_SCORE.items())).encode()).hexdigest()[:16]
+
+
+def build_pattern_table():
+    table = []
+    for length in range(1, 10):
+        for code in range(POW3[length]):
+            table.append(pattern_score([code // POW3[k] % 3 for k in range(length)]))
+    return table
+
+
+def save_npy(path, array):
+    """先写同目录下的临时文件再 os.replace，其他进程读到的要么是旧文件要么是完整的新文件"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def pattern_table():
+    """当前 PATTERN_SCORE 对应的打分表；按签名缓存到 PATTERN_TABLE_DIR，PATTERN_SCORE 变化后自动重建
+
+    缓存文件缺失、不完整或长度不对时重新生成，写入失败时只用内存中的表。
+    """
+    signature = pattern_signature()
+    if signature not in _pattern_tables:
+        path = os.path.join(PATTERN_TABLE_DIR, f"gobang_patterns_{signature}.npy")
+        try:
+            table = np.load(path).tolist()
+        except (OSError, ValueError, EOFError):
+            table = None
+        if table is None or len(table) != PATTERN_TABLE_SIZE:
+            table = build_pattern_table()
+            try:
+                save_npy(path, np.array(table, dtype=np.int64))
+            except OSError:
+                pass
+        _pattern_tables[signature] = table
+    return _pattern_tables[signature]
+
+
+@functools.lru_cache(maxsize=None)
+def line_windows(n):
+    """长度为 n 的线上以每格为中心的窗口：(3^起点, 3^窗口长度, 表内偏移)"""
+    windows = []
+    for c in range(n):
+        start, end = max(0, c - 4), min(n, c + 5)
+        windows.append((POW3[start], POW3[end - start], WINDOW_OFFSET[end - start]))
+    return tuple(windows)
+
+
+def encode_line(line):
+    """整条线的三进制编码；在第 k 格落子 p 时编码加上 p·3^k 即可增量更新"""
+    return sum(v * POW3[k] for k, v in enumerate(line))
+
+
+def code_score(code, windows, table):
+    """由整条线的编码查表，求以各格为中心的所有窗口的 pattern_score 之和"""
+    if not code:
+        return 0
+    return sum(table[offset + code // lo % span] for lo, span, offset in windows)
+
+
+# ── NumPy 向量化评估：棋盘外填充 OUTSIDE，它不会出现在任何棋型里，效果等同于截断窗口
+OUTSIDE = 3
+
+
+@functools.lru_cache(maxsize=None)
+def window_index(size):
+    """每个中心格、每个方向的 9 格窗口在填充后棋盘上的平铺下标，形状 (4*size*size, 9)"""
+    padded = size + 8
+    xs, ys = np.meshgrid(np.arange(size), np.arange(size), indexing="ij")
+    k = np.arange(-4, 5)
+    index = [
+        ((xs[..., None] + 4 + k * dx) * padded + ys[..., None] + 4 + k * dy)
+        for dx, dy in DIRS
+    ]
+    return np.concatenate([i.reshape(-1, 9) for i in index])
+
+
+def eval_boards_np(boards):
+    """批量向量化评估，boards 形状 (N, size, size)，返回每个棋盘的 eval_board 值"""
+    boards = np.asarray(boards)
+    n, size = boards.shape[0], boards.shape[-1]
+    padded = np.full((n, size + 8, size + 8), OUTSIDE, dtype=np.int8)
+    padded[:, 4:-4, 4:-4] = boards
+    windows = padded.reshape(n, -1)[:, window_index(size)]  # (N, 窗口数, 9)
+    by_len = {}
+    for pat, val in PATTERN_SCORE.items():
+        by_len.setdefault(len(pat), []).append((pat, val))
+    scores = np.zeros(n, dtype=np.int64)
+    for length, items in by_len.items():
+        pats = np.array([pat for pat, _ in items], dtype=np.int8)  # (k, length)
+        vals = np.array([val for _, val in items], dtype=np.int64)
+        sub = sliding_window_view(windows, length, axis=-1)  # (N, 窗口数, 起点, length)
+        hits = (sub[..., None, :] == pats).all(axis=-1)  # (N, 窗口数, 起点, k)
+        scores += hits.sum(axis=(1, 2)) @ vals
+    return scores
+
+
+def eval_board_np(b):
+    return int(eval_boards_np(b[None])[0])
+
+
+def build_lines():
+    """按 DIRS 列出棋盘上所有直线，以及每个格子在 4 个方向上的 (直线编号, 线上位置)"""
+    lines = []
+    cell_lines = [[[] for _ in range(SIZE)] for _ in range(SIZE)]
+    for dx, dy in DIRS:
+        for x in range(SIZE):
+            for y in range(SIZE):
+                if in_bounds(x - dx, y - dy):
+                    continue  # 不是直线起点
+                cells = []
+                cx, cy = x, y
+                while in_bounds(cx, cy):
+                    cell_lines[cx][cy].append((len(lines), len(cells)))
+                    cells.append((cx, cy))
+                    cx, cy = cx + dx, cy + dy
+                lines.append(cells)
+    return lines, cell_lines
+
+
+LINES, CELL_LINES = build_lines()
+LINE_WINDOWS = [line_windows(len(cells)) for cells in LINES]
+
+# ── Zobrist 哈希：每个格子每种棋子一个随机数，轮到 OPP 走时再异或 ZOBRIST_SIDE
+_zobrist_rng = random.Random(20250806)
+ZOBRIST = [
+    [
+        [0, _zobrist_rng.getrandbits(64), _zobrist_rng.getrandbits(64)]
+        for _ in range(SIZE)
+    ]
+    for _ in range(SIZE)
+]
+ZOBRIST_SIDE = _zobrist_rng.getrandbits(64)
+
+EXACT, LOWER, UPPER = 0, 1, 2  # 置换表条目的边界类型
+VALIDATE_WINS = False  # 为 True 时用全盘 is_win 校验每次上一手胜负判断
+
+
+class TranspositionTable:
+    """定长置换表：key 低位取槽，每槽一个条目 (key, depth, flag, value, move, generation)
+
+    替换策略：空槽、同一局面、旧一轮搜索留下的条目直接覆盖；
+    本轮搜索的其他局面只有在新条目深度不低于它时才覆盖。
+    """
+
+    def __init__(self, bits=16):
+        self.mask = (1 << bits) - 1
+        self.slots = [None] * (1 << bits)
+        self.generation = 0
+        self.probes = self.hits = self.stores = self.collisions = 0
+
+    def new_search(self):
+        self.generation += 1
+
+    def probe(self, key):
+        self.probes += 1
+        e = self.slots[key & self.mask]
+        if e is None:
+            return None
+        if e[0] != key:
+            self.collisions += 1
+            return None
+        self.hits += 1
+        return e
+
+    def store(self, key, depth, flag, value, move):
+        i = key & self.mask
+        e = self.slots[i]
+        if e is not None and e[0] != key and e[5] == self.generation and e[1] > depth:
+            return
+        self.slots[i] = (key, depth, flag, value, move, self.generation)
+        self.stores += 1
+
+    def stats(self):
+        return {
+            "probes": self.probes,
+            "hits": self.hits,
+            "stores": self.stores,
+            "collisions": self.collisions,
+            "used": sum(e is not None for e in self.slots),
+            "size": len(self.slots),
+        }
+
+
+# 默认在 ai_move 之间保留的置换表，大小固定
+TT = TranspositionTable()
+
+
+class Position:
+    """搜索用局面：包装棋盘，落子/悔棋时只重算经过该格的 4 条线，增量维护 eval_board"""
+
+    def __init__(self, b, radius=RADIUS):
+        self.b = b
+        self.size = SIZE
+        self.grid = b.tolist()
+        self.cand = CandidateSet(self.grid, radius)
+        self.table = pattern_table()
+        self.codes = [
+            encode_line([self.grid[x][y] for x, y in cells]) for cells in LINES
+        ]
+        self.line_scores = [
+            code_score(code, windows, self.table)
+            for code, windows in zip(self.codes, LINE_WINDOWS)
+        ]
+        self.score = sum(self.line_scores)  # 恒等于 eval_board(b)
+        self.key = 0  # Zobrist 哈希，不含走子方
+        for x, y in zip(*np.nonzero(b)):
+            self.key ^= ZOBRIST[x][y][self.grid[x][y]]
+        self.history = []
+
+    def play(self, x, y, p):
+        self.b[x, y] = p
+        self.grid[x][y] = p
+        self.key ^= ZOBRIST[x][y][p]
+        self.cand.add(x, y)
+        old = []
+        for i, k in CELL_LINES[x][y]:
+            old.append(self.line_scores[i])
+            self.codes[i] += p * POW3[k]
+            new = code_score(self.codes[i], LINE_WINDOWS[i], self.table)
+            self.score += new - self.line_scores[i]
+            self.line_scores[i] = new
+        self.history.append((x, y, p, old))
+
+    def undo(self):
+        x, y, p, old = self.history.pop()
+        self.key ^= ZOBRIST[x][y][p]
+        self.b[x, y] = EMPTY
+        self.grid[x][y] = EMPTY
+        self.cand.remove(x, y)
+        for (i, k), s in zip(CELL_LINES[x][y], old):
+            self.codes[i] -= p * POW3[k]
+            self.score += s - self.line_scores[i]
+            self.line_scores[i] = s
+
+    def moves(self, limit=MAX_MOVES):
+        return self.cand.moves(limit)
+
+    def won(self):
+        """上一手是否连成五子；没有上一手时退回全盘扫描"""
+        if not self.history:
+            return is_win(self.b, ME) or is_win(self.b, OPP)
+        x, y = self.history[-1][:2]
+        won = win_at(self.grid, x, y)
+        if VALIDATE_WINS:
+            assert won == (is_win(self.b, ME) or is_win(self.b, OPP))
+        return won
+
+
 def is_win(b, p):
+    if isinstance(b, BitBoard):
+        return b.is_win(p)
     for dx, dy in DIRS:
         for x in range(SIZE):
             for y in range(SIZE):
@@ -63,50 +344,1100 @@ def is_win(b, p):
     return False
 
 
-def moves(b):
-    cand = [(x, y) for x in range(SIZE) for y in range(SIZE) if b[x, y] == 0]
-    # 靠近棋子优先
-    cand.sort(
-        key=lambda m: min(
-            abs(m[0] - i) + abs(m[1] - j)
-            for i in range(SIZE)
-            for j in range(SIZE)
-            if b[i, j] != 0
+def win_at(b, x, y):
+    """只看经过 (x, y) 的 4 条线，判断该格的棋子是否连成五子；b 可以是棋盘或二维列表"""
+    p = b[x][y]
+    if p == EMPTY:
+        return False
+    for dx, dy in DIRS:
+        n = 1
+        for s in (1, -1):
+            cx, cy = x + s * dx, y + s * dy
+            while in_bounds(cx, cy) and b[cx][cy] == p:
+                n += 1
+                cx, cy = cx + s * dx, cy + s * dy
+        if n >= WIN:
+            return True
+    return False
+
+
+class CandidateSet:
+    """候选着法集合，落子/提子时只更新周围 RADIUS 格，与 Position 共用 grid
+
+    near[x][y] 为周围棋子按距离加权的计数（越近权重越大），候选按它从大到小、
+    再按坐标排序，保证同一局面总是得到同样的顺序。
+    """
+
+    def __init__(self, grid, radius=RADIUS):
+        self.grid = grid
+        # 每个格子周围 radius 格以内的邻格及权重
+        self.neighbours = [
+            [
+                [
+                    (x + dx, y + dy, radius + 1 - max(abs(dx), abs(dy)))
+                    for dx in range(-radius, radius + 1)
+                    for dy in range(-radius, radius + 1)
+                    if (dx or dy) and in_bounds(x + dx, y + dy)
+                ]
+                for y in range(SIZE)
+            ]
+            for x in range(SIZE)
+        ]
+        self.near = [[0] * SIZE for _ in range(SIZE)]
+        self.cells = set()
+        for x in range(SIZE):
+            for y in range(SIZE):
+                if grid[x][y] != EMPTY:
+                    self.add(x, y)
+
+    def add(self, x, y):
+        """(x, y) 落子后调用"""
+        grid, near, cells = self.grid, self.near, self.cells
+        cells.discard((x, y))
+        for nx, ny, w in self.neighbours[x][y]:
+            near[nx][ny] += w
+            if grid[nx][ny] == EMPTY:
+                cells.add((nx, ny))
+
+    def remove(self, x, y):
+        """(x, y) 提子后调用"""
+        near, cells = self.near, self.cells
+        for nx, ny, w in self.neighbours[x][y]:
+            near[nx][ny] -= w
+            if near[nx][ny] == 0:
+                cells.discard((nx, ny))
+        if near[x][y] > 0:
+            cells.add((x, y))
+
+    def moves(self, limit=MAX_MOVES):
+        near = self.near
+        cand = sorted(self.cells, key=lambda m: (-near[m[0]][m[1]], m))
+        if not cand:  # 空棋盘（或附近已下满）：按离中心的距离取空格
+            c = (SIZE - 1) / 2
+            cand = sorted(
+                (
+                    (x, y)
+                    for x in range(SIZE)
+                    for y in range(SIZE)
+                    if self.grid[x][y] == EMPTY
+                ),
+                key=lambda m: (max(abs(m[0] - c), abs(m[1] - c)), m),
+            )
+        return cand[:limit]
+
+
+def moves(b, limit=MAX_MOVES, radius=RADIUS):
+    if isinstance(b, BitBoard):
+        return b.moves(limit, radius)
+    return CandidateSet(b.tolist(), radius).moves(limit)
+
+
+# ── 大整数位棋盘：每方的棋子存为一个 Python 整数，(x, y) 对应第 x*(size+1)+y 位，
+#    每行末尾空出一位，沿 DIRS 移位时不会从一行的末尾连到下一行的开头
+@functools.lru_cache(maxsize=None)
+def bitboard_tables(size):
+    """size 路位棋盘的预计算表：(行宽, 全盘掩码, DIRS 移位量, 8 邻格移位量, 窗口权重, Zobrist)
+
+    窗口权重 weights[d][n][j]：长度为 n 的棋型从某格起沿方向 d 出现时，
+    被多少个中心在盘内的 9 格窗口包含（即 eval_board 会数它几次），按二进制位拆成掩码。
+    """
+    stride = size + 1
+
+    def bit(x, y):
+        return 1 << (x * stride + y)
+
+    def inside(x, y):
+        return 0 <= x < size and 0 <= y < size
+
+    cells = [(x, y) for x in range(size) for y in range(size)]
+    full = sum(bit(x, y) for x, y in cells)
+    shifts = [dx * stride + dy for dx, dy in DIRS]
+    neighbours = shifts + [-s for s in shifts]
+    weights = []
+    for dx, dy in DIRS:
+        by_len = {}
+        for n in range(1, 10):
+            planes = [0, 0, 0, 0]
+            for x, y in cells:
+                w = sum(inside(x + t * dx, y + t * dy) for t in range(n - 5, 5))
+                for j in range(4):
+                    if w >> j & 1:
+                        planes[j] |= bit(x, y)
+            by_len[n] = planes
+        weights.append(by_len)
+    rng = random.Random(size)
+    zobrist = [[rng.getrandbits(64) for _ in range(size * stride)] for _ in range(3)]
+    return stride, full, shifts, neighbours, weights, zobrist
+
+
+def iter_bits(m):
+    """从低位到高位依次给出 m 中为 1 的位号"""
+    while m:
+        low = m & -m
+        yield low.bit_length() - 1
+        m ^= low
+
+
+class BitBoard:
+    """位棋盘后端，棋盘大小运行时指定；接口与 Position 相同，可直接交给 negamax/ai_move"""
+
+    def __init__(self, size=SIZE):
+        self.size = size
+        (
+            self.stride,
+            self.full,
+            self.shifts,
+            self.neighbours,
+            self.weights,
+            self.zobrist,
+        ) = bitboard_tables(size)
+        self.bits = [0, 0, 0]  # 下标为 ME/OPP，EMPTY 位置不用
+        self.key = 0
+        self.history = []
+
+    @classmethod
+    def from_array(cls, b):
+        bb = cls(len(b))
+        for x, y in zip(*np.nonzero(b)):
+            bb.play(int(x), int(y), int(b[x, y]))
+        bb.history.clear()
+        return bb
+
+    def to_array(self):
+        b = np.zeros((self.size, self.size), dtype=int)
+        for p in (ME, OPP):
+            for i in iter_bits(self.bits[p]):
+                b[divmod(i, self.stride)] = p
+        return b
+
+    def copy(self):
+        bb = BitBoard(self.size)
+        bb.bits, bb.key, bb.history = self.bits[:], self.key, self.history[:]
+        return bb
+
+    def __getitem__(self, xy):
+        x, y = xy
+        i = x * self.stride + y
+        return (
+            ME if self.bits[ME] >> i & 1 else OPP if self.bits[OPP] >> i & 1 else EMPTY
         )
-    )
-    return cand[: min(20, len(cand))]  # 只取前 10 个候选
-
-
-def negamax(b, depth, alpha, beta, player):
-    if depth == 0 or is_win(b, ME) or is_win(b, OPP):
-        return eval_board(b) * player
-    best = -1e9
-    for x, y in moves(b):
-        b[x, y] = ME if player == 1 else OPP
-        val = -negamax(b, depth - 1, -beta, -alpha, -player)
-        b[x, y] = 0
-        best = max(best, val)
-        alpha = max(alpha, val)
+
+    def play(self, x, y, p):
+        i = x * self.stride + y
+        self.bits[p] |= 1 << i
+        self.key ^= self.zobrist[p][i]
+        self.history.append((x, y, p))
+
+    def undo(self):
+        x, y, p = self.history.pop()
+        i = x * self.stride + y
+        self.bits[p] ^= 1 << i
+        self.key ^= self.zobrist[p][i]
+
+    def is_win(self, p):
+        m = self.bits[p]
+        for s in self.shifts:
+            run = m & (m >> s)  # 连二的起点
+            run &= run >> (2 * s)  # 连四
+            if run & (m >> (4 * s)):  # 连五
+                return True
+        return False
+
+    def won(self):
+        """上一手是否连成五子；没有上一手时检查双方"""
+        if not self.history:
+            return self.is_win(ME) or self.is_win(OPP)
+        return self.is_win(self.history[-1][2])
+
+    @property
+    def score(self):
+        """与 eval_board 相同的评估：每种棋型沿每个方向用移位与运算一次匹配出所有起点"""
+        empty = self.full & ~(self.bits[ME] | self.bits[OPP])
+        planes = (empty, self.bits[ME], self.bits[OPP])
+        total = 0
+        for pat, val in PATTERN_SCORE.items():
+            n = len(pat)
+            if n > 9 or not planes[pat[0]]:
+                continue
+            for s, weights in zip(self.shifts, self.weights):
+                m = planes[pat[0]]
+                for k in range(1, n):
+                    m &= planes[pat[k]] >> (k * s)
+                    if not m:
+                        break
+                else:
+                    w = weights[n]
+                    total += val * (
+                        (m & w[0]).bit_count()
+                        + 2 * (m & w[1]).bit_count()
+                        + 4 * (m & w[2]).bit_count()
+                        + 8 * (m & w[3]).bit_count()
+                    )
+        return total
+
+    def moves(self, limit=MAX_MOVES, radius=RADIUS):
+        """离棋子 radius 格以内的空格：与两个以上棋子相邻的优先，其余按距离由近到远"""
+        occ = self.bits[ME] | self.bits[OPP]
+        empty = self.full & ~occ
+        if not occ:
+            c = self.size // 2
+            return [(c, c)][:limit]
+        rings, reached = [], occ
+        one = two = 0
+        for r in range(radius):
+            grown = 0
+            for s in self.neighbours:
+                n = (reached << s if s > 0 else reached >> -s) & self.full
+                if r == 0:
+                    two |= one & n
+                    one |= n
+                grown |= n
+            rings.append(grown & empty & ~reached)
+            reached |= grown
+        rings[0:1] = [rings[0] & two, rings[0] & ~two]
+        out = []
+        for ring in rings:
+            for i in iter_bits(ring):
+                out.append(divmod(i, self.stride))
+                if len(out) == limit:
+                    return out
+        return out
+
+
+def as_position(b):
+    """搜索用局面：位棋盘直接使用，NumPy 棋盘包装成 Position"""
+    return b if isinstance(b, BitBoard) else Position(b)
+
+
+# ── 威胁空间搜索：进攻方只下冲四（VCF）或冲四/活三（VCT），防守方只应对威胁
+VCF_NODES = 4000  # ai_move 搜索前威胁搜索的节点预算
+VCT_DEPTH = 3  # VCT 中进攻方最多连下几个活三
+SEARCH_VCF_NODES = 64  # 主搜索内每次 VCF 的节点预算
+SEARCH_VCF_BUDGET = 20000  # 一次 ai_move 主搜索内 VCF 的总节点预算
+SEARCH_VCF_DEPTH = 2  # 主搜索中剩余深度至少为此值的节点才做 VCF
+WIN_SCORE = 10**7  # 威胁搜索找到必胜时的得分，高于任何局面评估
+
+
+@functools.lru_cache(maxsize=None)
+def five_windows(size):
+    """size 路棋盘上所有连续 5 格的窗口，以及每个格子所在的窗口编号"""
+    windows = []
+    cell_windows = [[[] for _ in range(size)] for _ in range(size)]
+    for dx, dy in DIRS:
+        for x in range(size):
+            for y in range(size):
+                cells = [(x + k * dx, y + k * dy) for k in range(WIN)]
+                if all(0 <= cx < size and 0 <= cy < size for cx, cy in cells):
+                    for cx, cy in cells:
+                        cell_windows[cx][cy].append(len(windows))
+                    windows.append(cells)
+    return windows, cell_windows
+
+
+def to_grid(b):
+    """任意棋盘表示转成二维列表"""
+    if isinstance(b, ProfiledPosition):
+        b = b.pos
+    if isinstance(b, Position):
+        return b.grid
+    if isinstance(b, BitBoard):
+        return b.to_array().tolist()
+    return np.asarray(b).tolist()
+
+
+class ThreatSolver:
+    """在棋盘副本上做威胁搜索，按窗口增量维护双方子数
+
+    vcf/vct 返回从进攻方开始、双方交替的必胜着法序列，找不到或超出节点预算时返回 None。
+    expired 为无参函数（如 Search.expired）时每个节点检查一次，返回真即按超出预算处理。
+    """
+
+    def __init__(self, b, max_nodes=VCF_NODES, expired=None):
+        self.grid = [list(row) for row in to_grid(b)]
+        self.windows, self.cell_windows = five_windows(len(self.grid))
+        self.counts = [None, [0] * len(self.windows), [0] * len(self.windows)]
+        for i, cells in enumerate(self.windows):
+            for x, y in cells:
+                p = self.grid[x][y]
+                if p != EMPTY:
+                    self.counts[p][i] += 1
+        self.nodes = 0
+        self.max_nodes = max_nodes
+        self.expired = expired
+        self.timed_out = False
+
+    def exhausted(self):
+        """节点预算用完或已到截止时间"""
+        if not self.timed_out and self.expired is not None:
+            self.timed_out = self.expired()
+        return self.timed_out or self.nodes > self.max_nodes
+
+    def place(self, x, y, p):
+        self.grid[x][y] = p
+        counts = self.counts[p]
+        for i in self.cell_windows[x][y]:
+            counts[i] += 1
+
+    def remove(self, x, y, p):
+        self.grid[x][y] = EMPTY
+        counts = self.counts[p]
+        for i in self.cell_windows[x][y]:
+            counts[i] -= 1
+
+    def completions(self, p, need, through=None):
+        """p 有 need 子、其余为空的窗口里的空格，出现在越多窗口中的越靠前
+
+        through 为格子时只看经过该格的窗口。need=4 给出成五点，need=3 给出冲四点。
+        """
+        own, other = self.counts[p], self.counts[3 - p]
+        grid = self.grid
+        if through is None:
+            indices = range(len(self.windows))
+        else:
+            indices = self.cell_windows[through[0]][through[1]]
+        found = {}
+        for i in indices:
+            if own[i] == need and not other[i]:
+                for x, y in self.windows[i]:
+                    if grid[x][y] == EMPTY:
+                        found[x, y] = found.get((x, y), 0) + 1
+        return sorted(found, key=lambda c: -found[c])
+
+    def win_cells(self, p, move):
+        """move 之后 p 一步就能成活四或双四（至少两个成五点）的格子"""
+        cells = []
+        for x, y in self.completions(p, 3, through=move):
+            self.place(x, y, p)
+            if len(self.completions(p, 4, through=(x, y))) >= 2:
+                cells.append((x, y))
+            self.remove(x, y, p)
+        return cells
+
+    def vcf(self, p, line=()):
+        """p 先走，只用冲四取胜"""
+        self.nodes += 1
+        if self.exhausted():
+            return None
+        q = 3 - p
+        fives = self.completions(p, 4)
+        if fives:
+            return list(line) + [fives[0]]
+        threats = self.completions(q, 4)
+        if len(threats) > 1:
+            return None
+        for x, y in self.completions(p, 3):
+            if threats and (x, y) != threats[0]:
+                continue
+            self.place(x, y, p)
+            points = self.completions(p, 4, through=(x, y))
+            found = None
+            if len(points) >= 2:
+                found = list(line) + [(x, y)]
+            elif points:
+                dx, dy = points[0]
+                self.place(dx, dy, q)
+                found = self.vcf(p, list(line) + [(x, y), (dx, dy)])
+                self.remove(dx, dy, q)
+            self.remove(x, y, p)
+            if found:
+                return found
+        return None
+
+    def vct(self, p, depth=VCT_DEPTH, line=()):
+        """p 先走，用冲四和活三取胜，活三最多连下 depth 个
+
+        活三之后防守方可以下在进攻方的活四点、这些活四点对应的成五点，或者自己冲四；
+        其余着法都挡不住活四，因此只要这些应手全部被击败即为必胜。
+        """
+        found = self.vcf(p, line)
+        if found or depth <= 0 or self.exhausted():
+            return found
+        q = 3 - p
+        if self.completions(q, 4):  # 对方有冲四时只能走 VCF
+            return None
+        for x, y in self.completions(p, 2):
+            self.place(x, y, p)
+            gains = self.win_cells(p, (x, y))
+            found = None
+            if gains:
+                defences = dict.fromkeys(gains)
+                for gx, gy in gains:
+                    self.place(gx, gy, p)
+                    defences.update(
+                        dict.fromkeys(self.completions(p, 4, through=(gx, gy)))
+                    )
+                    self.remove(gx, gy, p)
+                defences.update(dict.fromkeys(self.completions(q, 3)))
+                for dx, dy in defences:
+                    self.place(dx, dy, q)
+                    sub = self.vct(p, depth - 1, list(line) + [(x, y), (dx, dy)])
+                    self.remove(dx, dy, q)
+                    if sub is None:
+                        found = None
+                        break
+                    if found is None:
+                        found = sub
+            self.remove(x, y, p)
+            if found:
+                return found
+            if self.exhausted():
+                break
+        return None
+
+
+def find_forced_win(b, p=ME, max_nodes=VCF_NODES, vct_depth=VCT_DEPTH, expired=None):
+    """p 先走时的必胜着法序列：先找 VCF，再在剩余预算内找 VCT，找不到返回 None
+
+    expired 见 ThreatSolver，到时间后放弃搜索并返回 None。
+    """
+    solver = ThreatSolver(b, max_nodes, expired)
+    if vct_depth:
+        return solver.vct(p, vct_depth)
+    return solver.vcf(p)
+
+
+MAX_PLY = 64  # 搜索的最大层数
+
+
+class SearchTimeout(Exception):
+    """搜索超过截止时间"""
+
+
+class SearchStats:
+    """ai_move(stats=...) 收集的搜索统计，多次 ai_move 共用一个对象时累加
+
+    calls/times 按类别记录调用次数和秒数：eval 为局面评估（Position.score 或
+    BitBoard.score），moves 为候选着法生成，is_win 为上一手胜负判断，threats 为威胁搜索。
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.nodes_by_depth = {}  # 完成的迭代深度 -> 该轮节点数
+        self.cutoffs = 0
+        self.calls = dict.fromkeys(("eval", "moves", "is_win", "threats"), 0)
+        self.times = dict.fromkeys(("eval", "moves", "is_win", "threats"), 0.0)
+        self.tt_probes = self.tt_hits = 0
+
+    def branching_factors(self):
+        """有效分支因子：每轮迭代的节点数与上一轮之比"""
+        n = self.nodes_by_depth
+        return {d: n[d] / n[d - 1] for d in n if d - 1 in n and n[d - 1]}
+
+    def as_dict(self):
+        return {
+            "nodes": self.nodes,
+            "nodes_by_depth": dict(self.nodes_by_depth),
+            "branching_factors": self.branching_factors(),
+            "cutoffs": self.cutoffs,
+            "calls": dict(self.calls),
+            "times": dict(self.times),
+            "tt_probes": self.tt_probes,
+            "tt_hits": self.tt_hits,
+        }
+
+
+class ProfiledPosition:
+    """包装 Position 或 BitBoard，为 SearchStats 统计评估、着法生成和胜负判断
+
+    只在传入 stats 时使用，不统计时搜索直接用原局面，没有额外开销。
+    """
+
+    def __init__(self, pos, stats):
+        self.pos = pos
+        self.stats = stats
+        self.size = pos.size
+        self.play = pos.play
+        self.undo = pos.undo
+
+    @property
+    def history(self):
+        return self.pos.history
+
+    @property
+    def key(self):
+        return self.pos.key
+
+    @property
+    def score(self):
+        t = time.perf_counter()
+        score = self.pos.score
+        self.stats.times["eval"] += time.perf_counter() - t
+        self.stats.calls["eval"] += 1
+        return score
+
+    def moves(self, *args, **kwargs):
+        t = time.perf_counter()
+        out = self.pos.moves(*args, **kwargs)
+        self.stats.times["moves"] += time.perf_counter() - t
+        self.stats.calls["moves"] += 1
+        return out
+
+    def won(self):
+        t = time.perf_counter()
+        won = self.pos.won()
+        self.stats.times["is_win"] += time.perf_counter() - t
+        self.stats.calls["is_win"] += 1
+        return won
+
+
+class Search:
+    """一次 ai_move 的搜索状态：置换表、截止时间，以及 PV/killer/history 走法排序信息"""
+
+    def __init__(
+        self, tt=None, time_ms=None, size=SIZE, vcf_budget=0, stop=None, hook=None
+    ):
+        self.tt = tt
+        self.deadline = None
+        if time_ms is not None:
+            self.deadline = time.perf_counter() + time_ms / 1000
+        self.stop = stop  # threading.Event，被置位时与超时一样中止搜索
+        self.hook = hook  # hook(事件名, 数据)，见 ai_move
+        self.nodes = 0
+        self.cutoffs = 0
+        self.root_ply = 0  # 根节点时 pos.history 的长度
+        self.pv = []  # 上一轮迭代的主要变例
+        self.lines = [[] for _ in range(MAX_PLY + 1)]  # 本轮各层的主要变例
+        self.killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        self.history = [[0] * size for _ in range(size)]
+        self.vcf_budget = vcf_budget  # 剩余的 VCF 节点预算，0 表示搜索中不做 VCF
+
+    def order(self, cand, ply, hash_move):
+        """置换表着法、上一轮 PV 着法、killer 着法优先，其余按 history 得分排序"""
+        pv_move = self.pv[ply] if ply < len(self.pv) else None
+        k1, k2 = self.killers[ply]
+        history = self.history
+
+        def rank(m):
+            if m == hash_move:
+                return 0, 0
+            if m == pv_move:
+                return 1, 0
+            if m == k1:
+                return 2, 0
+            if m == k2:
+                return 3, 0
+            return 4, -history[m[0]][m[1]]
+
+        return sorted(cand, key=rank)
+
+    def expired(self):
+        if self.stop is not None and self.stop.is_set():
+            return True
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def forced_win(self, pos, player):
+        """用剩余预算对走棋方做一次 VCF，返回必胜着法序列或 None；到截止时间时抛出 SearchTimeout"""
+        t = time.perf_counter()
+        solver = ThreatSolver(pos, min(SEARCH_VCF_NODES, self.vcf_budget), self.expired)
+        line = solver.vcf(ME if player == 1 else OPP)
+        self.vcf_budget -= min(solver.nodes, self.vcf_budget)
+        if isinstance(pos, ProfiledPosition):
+            pos.stats.times["threats"] += time.perf_counter() - t
+            pos.stats.calls["threats"] += 1
+        if solver.timed_out:
+            raise SearchTimeout
+        return line
+
+    def cutoff(self, move, ply, depth):
+        """记录产生剪枝的着法"""
+        self.cutoffs += 1
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1], killers[0] = killers[0], move
+        self.history[move[0]][move[1]] += depth * depth
+
+    def root(self, pos, root_moves, depth):
+        """搜索根节点，返回 (得分, 主要变例)
+
+        第一个着法用全窗口，其余先用零窗口试探，只有超过当前最好得分时才全窗口重搜。
+        """
+        alpha, beta = -1e9, 1e9
+        pv = []
+        for x, y in root_moves:
+            pos.play(x, y, ME)
+            if not pv:
+                val = -negamax(pos, depth - 1, -beta, -alpha, -1, self)
+            else:
+                val = -negamax(pos, depth - 1, -alpha - 1, -alpha, -1, self)
+                if val > alpha:
+                    val = -negamax(pos, depth - 1, -beta, -alpha, -1, self)
+            pos.undo()
+            if not pv or val > alpha:
+                alpha = val
+                pv = [(x, y)] + self.lines[1]
+            if self.hook is not None:
+                self.hook(
+                    "root_move",
+                    {"depth": depth, "move": (x, y), "score": val, "nodes": self.nodes},
+                )
+        return alpha, pv
+
+
+def negamax(pos, depth, alpha, beta, player, search=None):
+    if search is None:
+        search = Search()
+    ply = len(pos.history) - search.root_ply
+    search.lines[ply] = []
+    search.nodes += 1
+    if not search.nodes & 255 and search.expired():
+        raise SearchTimeout
+    if depth == 0 or ply >= MAX_PLY or pos.won():
+        return pos.score * player
+    tt = search.tt
+    alpha0, hash_move = alpha, None
+    if tt is not None:
+        key = pos.key ^ ZOBRIST_SIDE if player == -1 else pos.key
+        e = tt.probe(key)
+        if e is not None:
+            _, e_depth, flag, value, hash_move, _ = e
+            if e_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+    if search.vcf_budget and depth >= SEARCH_VCF_DEPTH:
+        line = search.forced_win(pos, player)
+        if line:
+            search.lines[ply] = line
+            if tt is not None:
+                tt.store(key, depth, EXACT, WIN_SCORE, line[0])
+            return WIN_SCORE
+    best, best_move = -1e9, None
+    for x, y in search.order(pos.moves(), ply, hash_move):
+        pos.play(x, y, ME if player == 1 else OPP)
+        val = -negamax(pos, depth - 1, -beta, -alpha, -player, search)
+        pos.undo()
+        if val > best:
+            best, best_move = val, (x, y)
+        if val > alpha:
+            alpha = val
+            search.lines[ply] = [(x, y)] + search.lines[ply + 1]
         if alpha >= beta:
+            search.cutoff((x, y), ply, depth)
+            break
+    if tt is not None:
+        flag = UPPER if best <= alpha0 else LOWER if best >= beta else EXACT
+        tt.store(key, depth, flag, best, best_move)
+    return best
+
+
+def ai_move(
+    b,
+    max_depth=4,
+    tt=TT,
+    time_ms=None,
+    info=None,
+    vcf_nodes=VCF_NODES,
+    stop=None,
+    stats=None,
+    hook=None,
+    use_book=True,
+):
+    """迭代加深搜索 ME 的落子，每一轮用上一轮的主要变例排序
+
+    use_book 时先查开局库，查到就直接返回（完成深度记为 0、节点数为 0）。
+    先用 vcf_nodes 个节点的威胁搜索找必胜序列，找到就直接走第一步（完成深度记为 0），
+    威胁搜索的用时计入 time_ms，同样受 stop 中止；
+    主搜索中也按 SEARCH_VCF_BUDGET 做 VCF；vcf_nodes=0 关闭两者。
+    给定 time_ms 时到截止时间即停止（stop 事件被置位时同样停止），返回最后一轮完整迭代的结果；
+    max_depth 为 None 表示只受时间限制。info 为 dict 时写入完成的深度 depth、
+    得分 score、主要变例 pv、节点数 nodes 和实际用时 time_ms。
+
+    stats 为 SearchStats 时填入本次搜索的统计。hook(事件名, 数据) 在每个根着法搜完后
+    以 "root_move" 调用（depth、move、score、nodes），每轮迭代完成后以 "iteration"
+    调用（depth、score、pv、nodes、time_ms）。两者都不传时搜索没有额外开销。
+    """
+    start = time.perf_counter()
+    booked = book_move(b) if use_book else None
+    if booked is not None:
+        move, score = booked
+        if info is not None:
+            info.update(
+                depth=0,
+                score=score,
+                pv=[move],
+                nodes=0,
+                time_ms=(time.perf_counter() - start) * 1000,
+            )
+        return move
+    pos = as_position(b)
+    if stats is not None:
+        pos = ProfiledPosition(pos, stats)
+        probes, hits = (tt.probes, tt.hits) if tt is not None else (0, 0)
+    search = Search(
+        tt,
+        time_ms,
+        pos.size,
+        vcf_budget=SEARCH_VCF_BUDGET if vcf_nodes else 0,
+        stop=stop,
+        hook=hook,
+    )
+    search.root_ply = len(pos.history)
+    if tt is not None:
+        tt.new_search()
+    root_moves = pos.moves()
+    move = root_moves[0] if root_moves else None
+    score, pv, reached = None, [], 0
+    depths = range(1, min(max_depth or MAX_PLY, MAX_PLY) + 1)
+    if not root_moves:
+        depths = ()  # 棋盘已满，返回 None
+    forced = None
+    if vcf_nodes and root_moves:
+        t = time.perf_counter()
+        forced = find_forced_win(pos, ME, vcf_nodes, expired=search.expired)
+        if stats is not None:
+            stats.times["threats"] += time.perf_counter() - t
+            stats.calls["threats"] += 1
+    if forced:
+        move, score, pv, depths = forced[0], WIN_SCORE, forced, ()
+    for depth in depths:
+        nodes = search.nodes
+        try:
+            score, pv = search.root(pos, root_moves, depth)
+        except SearchTimeout:
+            while len(pos.history) > search.root_ply:
+                pos.undo()
             break
+        move, reached = pv[0], depth
+        search.pv = pv
+        root_moves.remove(move)
+        root_moves.insert(0, move)
+        if stats is not None:
+            stats.nodes_by_depth[depth] = (
+                stats.nodes_by_depth.get(depth, 0) + search.nodes - nodes
+            )
+        if hook is not None:
+            hook(
+                "iteration",
+                {
+                    "depth": depth,
+                    "score": score,
+                    "pv": pv,
+                    "nodes": search.nodes,
+                    "time_ms": (time.perf_counter() - start) * 1000,
+                },
+            )
+    if stats is not None:
+        stats.nodes += search.nodes
+        stats.cutoffs += search.cutoffs
+        if tt is not None:
+            stats.tt_probes += tt.probes - probes
+            stats.tt_hits += tt.hits - hits
+    if info is not None:
+        info.update(
+            depth=reached,
+            score=score,
+            pv=pv,
+            nodes=search.nodes,
+            time_ms=(time.perf_counter() - start) * 1000,
+        )
+    return move
+
+
+# ── 开局库：离线深搜得到的 局面 -> (着法, 得分)，以 8 种对称下最小的 Zobrist 键为索引，
+#    按键排序存成 .npy，查询时 mmap 加载并二分查找
+BOOK_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), f"gobang_book_{SIZE}.npy"
+)
+BOOK_DTYPE = np.dtype([("key", "<u8"), ("move", "<u2"), ("score", "<i4")])
+BOOK_PLIES = 6  # 开局库只收子数少于此值的局面
+BOOK_DEPTH = 6  # 建库时每个局面的搜索深度
+BOOK_REPLIES = 3  # 建库时每个局面展开的对手应着数
+
+
+@functools.lru_cache(maxsize=None)
+def board_symmetries(size):
+    """size 路棋盘的 8 种对称变换，每种为 [x][y] -> (x', y') 的表，以及对应的逆变换表"""
+    n = size - 1
+    maps = [
+        lambda x, y: (x, y),
+        lambda x, y: (y, n - x),
+        lambda x, y: (n - x, n - y),
+        lambda x, y: (n - y, x),
+        lambda x, y: (y, x),
+        lambda x, y: (n - x, y),
+        lambda x, y: (n - y, n - x),
+        lambda x, y: (x, n - y),
+    ]
+    tables, inverses = [], []
+    for f in maps:
+        table = [[f(x, y) for y in range(size)] for x in range(size)]
+        inverse = [[None] * size for _ in range(size)]
+        for x in range(size):
+            for y in range(size):
+                tx, ty = table[x][y]
+                inverse[tx][ty] = (x, y)
+        tables.append(table)
+        inverses.append(inverse)
+    return tables, inverses
+
+
+def book_key(stones):
+    """[(x, y, p)] 在 8 种对称下 Zobrist 键的最小值，以及取到最小值的变换编号"""
+    best = None
+    for t, table in enumerate(board_symmetries(SIZE)[0]):
+        key = 0
+        for x, y, p in stones:
+            tx, ty = table[x][y]
+            key ^= ZOBRIST[tx][ty][p]
+        if best is None or key < best[0]:
+            best = key, t
     return best
 
 
-def ai_move(b, max_depth=4):
-    best, move = -1e9, None
-    for depth in range(1, max_depth + 1):
-        for x, y in moves(b):
+def grid_stones(grid):
+    return [(x, y, p) for x, row in enumerate(grid) for y, p in enumerate(row) if p]
+
+
+def build_book(
+    path=BOOK_PATH, plies=BOOK_PLIES, depth=BOOK_DEPTH, replies=BOOK_REPLIES, log=None
+):
+    """离线建开局库，返回收录的局面数
+
+    从空棋盘和对手第一手的所有（对称意义下不同的）位置出发，对每个轮到 ME 的局面
+    做 depth 层搜索记下最佳着法，再按 ponder_replies 展开 replies 个对手应着，
+    直到子数达到 plies。
+    """
+    global _book
+    tt = TranspositionTable()
+    roots = [np.zeros((SIZE, SIZE), dtype=int)]
+    for x in range(SIZE):
+        for y in range(SIZE):
+            b = np.zeros((SIZE, SIZE), dtype=int)
+            b[x, y] = OPP
+            roots.append(b)
+    entries = {}  # 规范键 -> (规范坐标下的着法编号, 得分)
+    frontier = roots
+    while frontier:
+        following = []
+        for b in frontier:
+            stones = grid_stones(b.tolist())
+            if len(stones) >= plies:
+                continue
+            key, t = book_key(stones)
+            if key in entries:
+                continue
+            info = {}
+            x, y = ai_move(b.copy(), max_depth=depth, tt=tt, info=info, use_book=False)
+            cx, cy = board_symmetries(SIZE)[0][t][x][y]
+            entries[key] = cx * SIZE + cy, int(info["score"])
+            if log:
+                log(f"{len(entries):5d} {len(stones)} 子 -> ({x}, {y}) {info['score']}")
             b[x, y] = ME
-            val = -negamax(b, depth - 1, -1e9, 1e9, -1)
-            b[x, y] = 0
-            if val > best:
-                best, move = val, (x, y)
+            if win_at(b, x, y):
+                continue
+            for rx, ry in ponder_replies(b, info["pv"], replies):
+                nb = b.copy()
+                nb[rx, ry] = OPP
+                if not win_at(nb, rx, ry):
+                    following.append(nb)
+        frontier = following
+    table = np.array(
+        [(key, move, score) for key, (move, score) in sorted(entries.items())],
+        dtype=BOOK_DTYPE,
+    )
+    save_npy(path, table)
+    _book = None  # 下次查询时重新加载
+    return len(table)
+
+
+class OpeningBook:
+    """mmap 只读加载的开局库"""
+
+    def __init__(self, path=BOOK_PATH):
+        self.entries = np.load(path, mmap_mode="r")
+        if self.entries.dtype != BOOK_DTYPE:
+            raise ValueError(f"开局库格式不对: {path}")
+        self.keys = self.entries["key"]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, grid):
+        """返回 ((x, y), 得分)，查不到时返回 None"""
+        stones = grid_stones(grid)
+        if len(stones) >= BOOK_PLIES:
+            return None
+        key, t = book_key(stones)
+        i = int(np.searchsorted(self.keys, np.uint64(key)))
+        if i == len(self.keys) or int(self.keys[i]) != key:
+            return None
+        code, score = int(self.entries[i]["move"]), int(self.entries[i]["score"])
+        x, y = board_symmetries(SIZE)[1][t][code // SIZE][code % SIZE]
+        if grid[x][y] != EMPTY:
+            return None
+        return (x, y), score
+
+
+_book = None  # 懒加载的开局库，False 表示文件不存在
+
+
+def get_book():
+    """返回共享的开局库，文件不存在时返回 None"""
+    global _book
+    if _book is None:
+        try:
+            _book = OpeningBook()
+        except (OSError, ValueError):
+            _book = False
+    return _book or None
+
+
+def book_move(b):
+    """查开局库得到 ME 的着法和得分；没有开局库、棋盘大小不符或查不到时返回 None"""
+    book = get_book()
+    if book is None:
+        return None
+    grid = to_grid(b)
+    if len(grid) != SIZE:
+        return None
+    return book.lookup(grid)
+
+
+# ── 多进程并行：根节点着法轮流分给各工作进程，各自迭代加深后按同一深度合并
+_pools = {}
+
+
+def process_pool(workers):
+    """按进程数缓存的进程池，多次调用之间复用"""
+    if workers not in _pools:
+        _pools[workers] = ProcessPoolExecutor(workers)
+    return _pools[workers]
+
+
+def search_root_moves(b, root_moves, max_depth=4, time_ms=None, use_tt=True):
+    """对每个根着法做全窗口迭代加深，返回 ({深度: {着法: 得分}}, 节点数)
+
+    use_tt 时每次调用新建置换表，结果不受之前搜索过的局面影响。
+    """
+    pos = as_position(b)
+    search = Search(TranspositionTable() if use_tt else None, time_ms, pos.size)
+    search.root_ply = len(pos.history)
+    scores = {}
+    for depth in range(1, min(max_depth or MAX_PLY, MAX_PLY) + 1):
+        layer = {}
+        try:
+            for x, y in root_moves:
+                pos.play(x, y, ME)
+                layer[x, y] = -negamax(pos, depth - 1, -1e9, 1e9, -1, search)
+                pos.undo()
+        except SearchTimeout:
+            while len(pos.history) > search.root_ply:
+                pos.undo()
+            break
+        scores[depth] = layer
+        root_moves = sorted(root_moves, key=lambda m: -layer[m])
+    return scores, search.nodes
+
+
+def ai_move_parallel(
+    b, max_depth=4, workers=None, time_ms=None, info=None, use_tt=True
+):
+    """多进程版 ai_move：取所有进程都完成的最大深度，得分最高者胜，同分按候选顺序
+
+    workers 默认为 CPU 核数；workers=1 时在当前进程内搜索，结果确定。
+    每个进程每次调用都用新的置换表，use_tt=False 时不用置换表（便于测量扩展性）。
+    """
+    start = time.perf_counter()
+    root_moves = as_position(b.copy()).moves()
+    if not root_moves:
+        return None
+    workers = max(1, min(workers or os.cpu_count() or 1, len(root_moves)))
+    chunks = [root_moves[i::workers] for i in range(workers)]
+    if workers == 1:
+        results = [search_root_moves(b.copy(), chunks[0], max_depth, time_ms, use_tt)]
+    else:
+        pool = process_pool(workers)
+        futures = [
+            pool.submit(search_root_moves, b.copy(), chunk, max_depth, time_ms, use_tt)
+            for chunk in chunks
+        ]
+        results = [f.result() for f in futures]
+    depth = min(max(scores, default=0) for scores, _ in results)
+    move, score = root_moves[0], None
+    if depth:
+        merged = {}
+        for scores, _ in results:
+            merged.update(scores[depth])
+        move = max(root_moves, key=lambda m: merged[m])
+        score = merged[move]
+    if info is not None:
+        info.update(
+            depth=depth,
+            score=score,
+            workers=workers,
+            nodes=sum(nodes for _, nodes in results),
+            time_ms=(time.perf_counter() - start) * 1000,
+        )
     return move
 
 
-# ── CLI 演示
+# ── 后台思考：对手思考时按预测的对手着法提前搜索，命中时直接复用结果
+def ponder_replies(b, pv, limit=PONDER_MOVES):
+    """预测对手的应着：AI 主要变例中的下一步优先，其余按候选着法顺序"""
+    replies = [pv[1]] if len(pv) > 1 else []
+    for m in moves(b):
+        if len(replies) >= limit:
+            break
+        if m not in replies:
+            replies.append(m)
+    return replies
+
+
+class Ponder:
+    """后台线程依次假设对手走 replies 中的着法，用 ai_move 预先算出 AI 的应着
+
+    与前台搜索共用置换表，因此即使预测落空，已经搜过的局面在之后的搜索中仍可命中。
+    """
+
+    def __init__(self, b, replies, time_ms=THINK_MS, tt=TT):
+        self.b = b.copy()
+        self.replies = replies
+        self.time_ms = time_ms
+        self.tt = tt
+        self.results = {}  # 对手着法 -> (AI 着法, info)
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        for x, y in self.replies:
+            b = self.b.copy()
+            b[x, y] = OPP
+            if win_at(b, x, y):
+                continue
+            info = {}
+            move = ai_move(
+                b,
+                max_depth=None,
+                tt=self.tt,
+                time_ms=self.time_ms,
+                info=info,
+                stop=self.stop,
+            )
+            if self.stop.is_set():  # 被中止的搜索没有完整用完思考时间，不保留
+                return
+            self.results[x, y] = move, info
+
+    def result(self, x, y):
+        """停止后台搜索，返回对手实际着法 (x, y) 的预先结果 (着法, info)，没有则为 None"""
+        self.stop.set()
+        self.thread.join()
+        return self.results.get((x, y))
+
+
+# ── CLI 演示，--no-ponder 关闭后台思考，--build-book 离线建开局库
 if __name__ == "__main__":
+    if "--build-book" in sys.argv:
+        count = build_book(log=print)
+        print(f"已写入 {BOOK_PATH}，共 {count} 个局面")
+        sys.exit()
     board = np.zeros((SIZE, SIZE), dtype=int)
+    ponder = None
     while True:
         print(board)
         while True:
@@ -121,9 +1452,25 @@ if __name__ == "__main__":
             print("你赢了")
             break
         t = time.time()
-        mx, my = ai_move(board)
-        print("AI 用时 %.2fs 落子 %d %d" % (time.time() - t, mx, my))
+        pondered = ponder.result(x, y) if ponder else None
+        if pondered:
+            (mx, my), info = pondered
+        else:
+            info = {}
+            mx, my = ai_move(board, max_depth=None, time_ms=THINK_MS, info=info)
+        print(
+            "AI 用时 %.2fs 深度 %d 落子 %d %d%s"
+            % (
+                time.time() - t,
+                info["depth"],
+                mx,
+                my,
+                "（预测命中）" if pondered else "",
+            )
+        )
         board[mx, my] = ME
         if is_win(board, ME):
             print("AI 赢")
             break
+        if "--no-ponder" not in sys.argv:
+            ponder = Ponder(board, ponder_replies(board, info["pv"]))
@@ -0,0 +1,243 @@
+"""gobangAI 引擎对战：多进程并行下大量对局，逐局写入结果文件，汇总胜/和/负、置信区间和 Elo 差
+
+    python gobang_arena.py --games 1000 --a '{"max_depth": 3}' --b '{"max_depth": 2}'
+    python gobang_arena.py --report gobang_arena.txt
+
+每一方的设置是一个 JSON 对象，可以包含 max_depth、time_ms、vcf_nodes、use_book，以及
+pattern_score：覆盖 PATTERN_SCORE 中的棋型，键为棋型数字串（1 为己方，2 为对方），
+例如 {"pattern_score": {"01110": 900, "02220": -900}}。
+use_book 默认关闭：开局库按默认 PATTERN_SCORE 生成，双方查到的着法相同，会冲淡两方设置的差别；
+给了 pattern_score 的一方即使设置 use_book 也不查开局库。
+每对对局使用同一个随机开局并交换先后手。
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import gobangAI as g
+
+DEFAULT_SETTINGS = {
+    "max_depth": 2,
+    "time_ms": None,
+    "vcf_nodes": g.VCF_NODES,
+    "use_book": False,
+}
+OPENING_PLIES = 4  # 随机开局的手数
+OPENING_RADIUS = 2  # 随机开局落在离中心不超过该距离的格子里
+RESULTS_PATH = "gobang_arena.txt"
+Z95 = 1.96
+
+
+def side_settings(overrides=None):
+    """合并默认设置，并把 pattern_score 覆盖项展开成完整的 PATTERN_SCORE（同时关闭开局库）"""
+    settings = dict(DEFAULT_SETTINGS, **(overrides or {}))
+    scores = settings.pop("pattern_score", None)
+    if scores:
+        table = dict(g.PATTERN_SCORE)
+        table.update({tuple(int(c) for c in pat): val for pat, val in scores.items()})
+        settings["pattern_score"] = table
+        settings["use_book"] = False  # 开局库来自默认 PATTERN_SCORE
+    return settings
+
+
+def random_opening(rng, plies=OPENING_PLIES):
+    """在中心附近随机交替落 plies 个子，返回 [(x, y), ...]"""
+    c = g.SIZE // 2
+    cells = [
+        (x, y)
+        for x in range(c - OPENING_RADIUS, c + OPENING_RADIUS + 1)
+        for y in range(c - OPENING_RADIUS, c + OPENING_RADIUS + 1)
+        if g.in_bounds(x, y)
+    ]
+    return rng.sample(cells, min(plies, len(cells)))
+
+
+def engine_move(b, color, settings, tt):
+    """color 方按 settings 走一步；引擎总是以 ME 下棋，因此白方看到的是交换颜色后的棋盘"""
+    view = b.copy() if color == g.ME else np.where(b == g.EMPTY, g.EMPTY, 3 - b)
+    saved = g.PATTERN_SCORE
+    g.PATTERN_SCORE = settings.get("pattern_score", saved)
+    try:
+        return g.ai_move(
+            view,
+            max_depth=settings["max_depth"],
+            tt=tt,
+            time_ms=settings["time_ms"],
+            vcf_nodes=settings["vcf_nodes"],
+            use_book=settings["use_book"],
+        )
+    finally:
+        g.PATTERN_SCORE = saved
+
+
+def play_game(game, seed, settings_a, settings_b, plies=OPENING_PLIES):
+    """下一局，第 game 局与第 game^1 局共用开局、交换先后手
+
+    返回 (局号, A 是否先手, A 的得分 1/0.5/0, 手数, 着法列表)。
+    """
+    opening = random_opening(random.Random(seed * 1000003 + game // 2), plies)
+    a_first = game % 2 == 0
+    sides = {
+        g.ME: settings_a if a_first else settings_b,
+        g.OPP: settings_b if a_first else settings_a,
+    }
+    tts = {g.ME: g.TranspositionTable(), g.OPP: g.TranspositionTable()}
+    b = np.zeros((g.SIZE, g.SIZE), dtype=int)
+    grid = b.tolist()
+    moves, winner, color = [], None, g.ME
+    while len(moves) < g.SIZE * g.SIZE:
+        if len(moves) < len(opening):
+            x, y = opening[len(moves)]
+        else:
+            x, y = engine_move(b, color, sides[color], tts[color])
+        b[x, y] = grid[x][y] = color
+        moves.append((int(x), int(y)))
+        if g.win_at(grid, x, y):
+            winner = color
+            break
+        color = 3 - color
+    if winner is None:
+        score = 0.5
+    else:
+        score = 1.0 if (winner == g.ME) == a_first else 0.0
+    return game, a_first, score, len(moves), moves
+
+
+def format_result(result):
+    """一局一行：局号 A先手 A得分 手数 着法（格子编号 x*SIZE+y，逗号分隔）"""
+    game, a_first, score, plies, moves = result
+    cells = ",".join(str(x * g.SIZE + y) for x, y in moves)
+    return f"{game} {int(a_first)} {score:g} {plies} {cells}"
+
+
+def read_results(path):
+    """读取结果文件，返回每局 A 的得分列表"""
+    scores = []
+    with open(path) as f:
+        for line in f:
+            if line.strip() and not line.startswith("#"):
+                scores.append(float(line.split()[2]))
+    return scores
+
+
+def wilson(k, n, z=Z95):
+    """比例 k/n 的 Wilson 置信区间"""
+    if not n:
+        return 0.0, 1.0
+    p = k / n
+    centre = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def elo(score):
+    """平均得分对应的 Elo 差，得分为 0 或 1 时为 ∓inf"""
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def summarize(scores, z=Z95):
+    """汇总 A 的战绩：胜/和/负数及比例区间、平均得分区间和 Elo 差区间"""
+    n = len(scores)
+    wins, draws = scores.count(1.0), scores.count(0.5)
+    losses = n - wins - draws
+    mean = sum(scores) / n if n else 0.5
+    var = sum((s - mean) ** 2 for s in scores) / n if n else 0.0
+    half = z * math.sqrt(var / n) if n else 0.5
+    low, high = max(0.0, mean - half), min(1.0, mean + half)
+    return {
+        "games": n,
+        "wins": wins,
+        "draws": draws,
+        "losses": losses,
+        "win_ci": wilson(wins, n, z),
+        "draw_ci": wilson(draws, n, z),
+        "loss_ci": wilson(losses, n, z),
+        "score": mean,
+        "score_ci": (low, high),
+        "elo": elo(mean),
+        "elo_ci": (elo(low), elo(high)),
+    }
+
+
+def format_summary(s):
+    def pct(ci):
+        return f"[{ci[0]:.1%}, {ci[1]:.1%}]"
+
+    return (
+        f"games {s['games']}  A +{s['wins']} ={s['draws']} -{s['losses']}\n"
+        f"win {pct(s['win_ci'])}  draw {pct(s['draw_ci'])}  loss {pct(s['loss_ci'])}\n"
+        f"score {s['score']:.3f} [{s['score_ci'][0]:.3f}, {s['score_ci'][1]:.3f}]  "
+        f"Elo {s['elo']:+.0f} [{s['elo_ci'][0]:+.0f}, {s['elo_ci'][1]:+.0f}]"
+    )
+
+
+def run(
+    games,
+    settings_a,
+    settings_b,
+    workers=None,
+    path=RESULTS_PATH,
+    seed=0,
+    plies=OPENING_PLIES,
+    log=sys.stdout,
+):
+    """用进程池下 games 局，每局结束立即追加到 path，返回 (A 的得分列表, 每分钟局数)"""
+    a, b = side_settings(settings_a), side_settings(settings_b)
+    workers = workers or os.cpu_count() or 1
+    scores = []
+    start = time.perf_counter()
+    with open(path, "w") as out, ProcessPoolExecutor(workers) as pool:
+        out.write(
+            f"# a={json.dumps(settings_a or {})} b={json.dumps(settings_b or {})}\n"
+        )
+        out.write(f"# seed={seed} plies={plies} size={g.SIZE}\n")
+        futures = [
+            pool.submit(play_game, game, seed, a, b, plies) for game in range(games)
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            out.write(format_result(result) + "\n")
+            out.flush()
+            scores.append(result[2])
+            if log and done % 100 == 0:
+                print(f"{done}/{games}", file=log, flush=True)
+    per_minute = games / (time.perf_counter() - start) * 60
+    return scores, per_minute
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--a", type=json.loads, default={}, help="A 方设置 (JSON)")
+    parser.add_argument("--b", type=json.loads, default={}, help="B 方设置 (JSON)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=RESULTS_PATH)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--opening", type=int, default=OPENING_PLIES)
+    parser.add_argument("--report", metavar="PATH", help="只汇总已有的结果文件")
+    args = parser.parse_args(argv)
+
+    if args.report:
+        print(format_summary(summarize(read_results(args.report))))
+        return
+    scores, per_minute = run(
+        args.games, args.a, args.b, args.workers, args.out, args.seed, args.opening
+    )
+    print(format_summary(summarize(scores)))
+    print(f"{per_minute:.0f} games/min")
+
+
+if __name__ == "__main__":
+    main()
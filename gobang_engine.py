@@ -0,0 +1,151 @@
+"""gobangAI 引擎模式：在 stdin/stdout 上使用 Gomocup/piskvork 风格的行协议，一个进程服务多局
+
+    python gobang_engine.py
+
+支持 START、RESTART、BEGIN、TURN、BOARD ... DONE、INFO、ABOUT、END。
+INFO 中的 timeout_turn、time_left（毫秒）决定每步的思考时间。
+置换表、棋型表和开局库在对局之间一直保留，只有第一步需要付出加载的开销。
+"""
+
+import sys
+
+import gobangAI as g
+
+ABOUT = 'name="gobangAI", version="1.0", country="CN"'
+MIN_SIZE, MAX_SIZE = g.WIN, 32
+TT_BITS = 20
+TURN_MS = 5000  # 管理器没有给 timeout_turn 时每步的思考时间
+FAST_MS = 100  # timeout_turn 为 0（尽快落子）时的思考时间
+TIME_LEFT_SHARE = 10  # 给出 time_left 时每步最多用掉剩余时间的 1/TIME_LEFT_SHARE
+MARGIN_MS = 30  # 预留给通信与最后一轮迭代收尾的时间
+
+
+class Engine:
+    """协议状态机：handle() 处理一行命令，需要退出时返回 False"""
+
+    def __init__(self, out=sys.stdout):
+        self.out = out
+        self.tt = g.TranspositionTable(TT_BITS)
+        self.board = None
+        self.info = {"timeout_turn": TURN_MS, "time_left": None}
+        self.board_lines = None  # 正在读取 BOARD 命令时收集的行
+
+    def send(self, line):
+        print(line, file=self.out, flush=True)
+
+    def think_ms(self):
+        """按 INFO 的设置计算本步的思考时间（毫秒）"""
+        budget = self.info["timeout_turn"] or FAST_MS
+        if self.info["time_left"] is not None:
+            budget = min(budget, self.info["time_left"] / TIME_LEFT_SHARE)
+        return max(1, budget - MARGIN_MS)
+
+    def think(self):
+        """ME 走一步并回复坐标"""
+        info = {}
+        move = g.ai_move(
+            self.board, max_depth=None, tt=self.tt, time_ms=self.think_ms(), info=info
+        )
+        if move is None:
+            self.send("ERROR 棋盘已满")
+            return
+        x, y = move
+        self.board.play(x, y, g.ME)
+        self.send(
+            f"MESSAGE depth {info['depth']} score {info['score']} "
+            f"nodes {info['nodes']} time {info['time_ms']:.0f}ms"
+        )
+        self.send(f"{x},{y}")
+
+    def place(self, text, p):
+        """落下 "x,y" 处的棋子，坐标非法或已有子时返回错误信息"""
+        try:
+            x, y = map(int, text.split(",")[:2])
+        except ValueError:
+            return f"无法解析坐标 {text}"
+        if not (0 <= x < self.board.size and 0 <= y < self.board.size):
+            return f"坐标越界 {x},{y}"
+        if self.board[x, y] != g.EMPTY:
+            return f"已有棋子 {x},{y}"
+        self.board.play(x, y, p)
+        return None
+
+    def handle(self, line):
+        line = line.strip()
+        if self.board_lines is not None:
+            if line.upper() == "DONE":
+                return self.end_board()
+            self.board_lines.append(line)
+            return True
+        command, _, arg = line.partition(" ")
+        command = command.upper()
+        arg = arg.strip()
+        if not command:
+            return True
+        if command == "END":
+            return False
+        if command == "ABOUT":
+            self.send(ABOUT)
+        elif command == "START":
+            try:
+                size = int(arg)
+            except ValueError:
+                size = 0
+            if not MIN_SIZE <= size <= MAX_SIZE:
+                self.send(f"ERROR 不支持的棋盘大小 {arg}")
+            else:
+                self.board = g.BitBoard(size)
+                self.send("OK")
+        elif command == "INFO":
+            key, _, value = arg.partition(" ")
+            try:
+                self.info[key.lower()] = int(value)
+            except ValueError:
+                self.info[key.lower()] = value
+        elif self.board is None:
+            self.send("ERROR 需要先 START")
+        elif command == "RESTART":
+            self.board = g.BitBoard(self.board.size)
+            self.send("OK")
+        elif command == "BEGIN":
+            self.think()
+        elif command == "TURN":
+            error = self.place(arg, g.OPP)
+            if error:
+                self.send(f"ERROR {error}")
+            else:
+                self.think()
+        elif command == "BOARD":
+            self.board_lines = []
+        else:
+            self.send(f"UNKNOWN {command}")
+        return True
+
+    def end_board(self):
+        """BOARD 的每行为 x,y,field：1 为己方，2 为对方（3 用于连续对局，按对方处理）"""
+        lines, self.board_lines = self.board_lines, None
+        self.board = g.BitBoard(self.board.size)
+        for line in lines:
+            parts = line.split(",")
+            owner = g.ME if parts[-1].strip() == "1" else g.OPP
+            error = self.place(line, owner)
+            if error:
+                self.send(f"ERROR {error}")
+                return True
+        self.think()
+        return True
+
+
+def main(stdin=sys.stdin, stdout=sys.stdout):
+    engine = Engine(stdout)
+    for line in stdin:
+        try:
+            if not engine.handle(line):
+                break
+        except Exception as e:  # 一条命令出错只回复 ERROR，引擎继续服务
+            engine.board_lines = None
+            engine.send(f"ERROR {type(e).__name__}: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
+import sys
 import tkinter as tk
 from tkinter import messagebox
 from datetime import datetime
 
+from ultimate_ai import PLAYERS
+from ultimate_engine import NAMES, OPEN, RED, BLUE, TIE, UltimateBoard
+
 
 class TicTacToeGame:
     def __init__(self, game_type):
@@ -9,14 +13,11 @@ class TicTacToeGame:
         self.root = tk.Tk()
         self.root.title("Tic-Tac-Toe")
 
-        # Create an empty buttons_state
-        self.buttons_state = [[" " for _ in range(9)] for _ in range(9)]
-        self.sub_board_state = [" " for _ in range(9)]
-        self.current_player = (
-            "Red"  # 'Red' represents player 1, 'Blue' represents player 2
-        )
+        # The rules and the board state live in the headless engine
+        self.game = UltimateBoard()
+        # game_type "0" is two humans, otherwise an ultimate_ai.PLAYERS name for Blue
+        self.ai = None if game_type == "0" else PLAYERS[game_type]()
         self.player_color = {"Red": "#FFC0C0", "Blue": "#C0D6FF", "Tie": "#DFCBEF"}
-        self.last_place = None
 
         # Define alternating colors for the board (like a chessboard pattern)
         self.light_color = "#FFFACD"
@@ -24,6 +25,11 @@ class TicTacToeGame:
         self.move_log = []  # List to store the move log
         self.game_log = []  # List to store the game log
 
+    # 'Red' represents player 1, 'Blue' represents player 2
+    @property
+    def current_player(self):
+        return NAMES[self.game.player]
+
     # Function to update the current player's label
     def update_current_player(self):
         self.player_label2.config(text=f"{self.current_player}")
@@ -33,31 +39,21 @@ class TicTacToeGame:
 
     # Function to update the possible moves on the small board
     def update_possible_moves(self):
-        if self.last_place is None or self.sub_board_state[self.last_place] != " ":
-            for i, small_button in enumerate(self.small_board):
-                if self.sub_board_state[i] == " ":
-                    small_button.config(bg=self.light_color, state="disabled")
-                else:
-                    small_button.config(
-                        bg=self.player_color[self.sub_board_state[i]], state="disabled"
-                    )
-        else:
-            for i, small_button in enumerate(self.small_board):
-                if i == self.last_place:
-                    small_button.config(bg=self.light_color, state="disabled")
-                elif self.sub_board_state[i] == " ":
-                    small_button.config(bg=self.colors[i % 2], state="disabled")
-                else:
-                    small_button.config(
-                        bg=self.player_color[self.sub_board_state[i]], state="disabled"
-                    )
+        forced = self.game.forced
+        for i, small_button in enumerate(self.small_board):
+            state = self.game.macro[i]
+            if state != OPEN:
+                small_button.config(
+                    bg=self.player_color[NAMES[state]], state="disabled"
+                )
+            elif forced is None or i == forced:
+                small_button.config(bg=self.light_color, state="disabled")
+            else:
+                small_button.config(bg=self.colors[i % 2], state="disabled")
 
     # Function to reset the game board
     def reset_board(self):
-        self.buttons_state = [[" " for _ in range(9)] for _ in range(9)]
-        self.sub_board_state = [" " for _ in range(9)]
-        self.current_player = "Red"
-        self.last_place = None
+        self.game = UltimateBoard()
         self.move_log = []  # List to store the move log
         self.game_log = []  # List to store the game log
         self.update_possible_moves()
@@ -76,91 +72,72 @@ class TicTacToeGame:
         messagebox.showinfo("Game Over", message + f"Game log saved to {file_name}")
         self.reset_board()
 
+    # Function to handle a click on the board, ignored while the AI is to move
+    def human_move(self, index):
+        if self.ai is not None and self.game.player == BLUE:
+            return
+        self.player_move(index)
+        if self.ai is not None and self.game.player == BLUE:
+            # Let the board redraw before the AI starts thinking
+            self.root.after(10, self.ai_move)
+
+    # Function to let the AI play its move
+    def ai_move(self):
+        if self.ai is not None and self.game.player == BLUE:
+            self.player_move(divmod(self.ai.choose(self.game), 9))
+
     # Function to handle player move
     def player_move(self, index):
         i, j = index
-        if self.buttons_state[i][j] == " " and (
-            self.last_place is None
-            or self.sub_board_state[self.last_place] != " "
-            or i == self.last_place
-        ):
-            # Update the buttons_state and color
-            self.buttons_state[i][j] = self.current_player
-            self.board[i][j].config(
-                bg=self.player_color[self.current_player], state="disabled"
-            )
-            self.undo_button.config(bg=self.player_color[self.current_player])
-            self.resign_button.config(
-                bg=self.player_color["Blue" if self.current_player == "Red" else "Red"]
-            )
+        if self.game.is_legal(i, j):
+            player = self.current_player
+            # Play the move in the engine and update the color
+            self.game.make(i * 9 + j)
+            self.board[i][j].config(bg=self.player_color[player], state="disabled")
+            self.undo_button.config(bg=self.player_color[player])
+            self.resign_button.config(bg=self.player_color[self.current_player])
             self.move_log.append(index)
             self.game_log.append(index)
 
-            # Check for a win or tie in sub_board
-            if self.check_sub_winner(self.current_player, i):
-                self.sub_board_state[i] = self.current_player
+            # Color a sub_board won by this move, then check the whole board
+            if self.game.macro[i] in (RED, BLUE):
                 for button in self.board[i]:
-                    button.config(
-                        bg=self.player_color[self.current_player], state="disabled"
-                    )
-                if self.check_winner(self.current_player):
-                    self.game_over(f"Player {self.current_player} wins!")
-                    return
-                elif self.check_tie():
+                    button.config(bg=self.player_color[player], state="disabled")
+            if self.game.winner is not None:
+                if self.game.winner == TIE:
                     self.game_over("It's a tie!")
-                    return
-            elif self.check_sub_tie(i):
-                self.sub_board_state[i] = "Tie"
-                if self.check_tie():
-                    self.game_over("It's a tie!")
-                    return
+                else:
+                    self.game_over(f"Player {player} wins!")
+                return
 
-            # Switch players & mark the place
-            self.current_player = "Blue" if self.current_player == "Red" else "Red"
-            self.last_place = j
             self.update_current_player()
             self.update_possible_moves()
 
     # Function to handle undoing the last move
     def undo_last_move(self):
-        if self.last_place is not None:
+        if self.game.history:
             i, j = self.move_log.pop()
             self.game_log.append((-1, -1))
+            # Switch back to the previous player and reopen the sub board
+            self.game.unmake()
+            for k in range(9):
+                if self.game.cell(i, k) == OPEN:
+                    self.board[i][k].config(state="normal", bg=self.colors[i % 2])
+                else:
+                    self.board[i][k].config(
+                        state="disabled",
+                        bg=self.player_color[NAMES[self.game.cell(i, k)]],
+                    )
 
-            if self.sub_board_state[i] == " ":
-                # Reset the button and enable it again
-                self.buttons_state[i][j] = " "
-                self.board[i][j].config(state="normal", bg=self.colors[i % 2])
-            elif self.sub_board_state[i] == "Tie":
-                # Reset the button and enable it again then Reset the sub board
-                self.buttons_state[i][j] = " "
-                self.board[i][j].config(state="normal", bg=self.colors[i % 2])
-                self.sub_board_state[i] = " "
-            else:
-                # Reset the button and Reset the sub board
-                self.buttons_state[i][j] = " "
-                self.sub_board_state[i] = " "
-                for k in range(9):
-                    if self.buttons_state[i][k] == " ":
-                        self.board[i][k].config(state="normal", bg=self.colors[i % 2])
-                    else:
-                        self.board[i][k].config(
-                            state="disabled",
-                            bg=self.player_color[self.buttons_state[i][k]],
-                        )
-
-            self.undo_button.config(
+            self.undo_button.config(bg=self.player_color[self.current_player])
+            self.resign_button.config(
                 bg=self.player_color["Blue" if self.current_player == "Red" else "Red"]
             )
-            self.resign_button.config(bg=self.player_color[self.current_player])
-            # Switch back to the previous player
-            self.current_player = "Red" if self.current_player == "Blue" else "Blue"
-            if self.move_log:
-                self.last_place = self.move_log[-1][1]
-            else:
-                self.last_place = None
             self.update_current_player()
             self.update_possible_moves()
+            # Against the AI, take back its reply together with the human move
+            if self.ai is not None and self.game.player == BLUE:
+                self.undo_last_move()
 
     # Function to handle resigning game
     def resign_game(self):
@@ -170,58 +147,6 @@ class TicTacToeGame:
         self.game_log.append((-2, -2))
         self.game_over(f"Player {self.current_player} resigned. Player {winner} wins!")
 
-    # Function to check if there's a winner in sub_board
-    def check_sub_winner(self, player, i):
-        win_conditions = [
-            (0, 1, 2),
-            (3, 4, 5),
-            (6, 7, 8),  # Rows
-            (0, 3, 6),
-            (1, 4, 7),
-            (2, 5, 8),  # Columns
-            (0, 4, 8),
-            (2, 4, 6),  # Diagonals
-        ]
-        for condition in win_conditions:
-            if (
-                self.buttons_state[i][condition[0]]
-                == self.buttons_state[i][condition[1]]
-                == self.buttons_state[i][condition[2]]
-                == player
-            ):
-                return True
-        return False
-
-    # Function to check if there's a tie in sub_board
-    def check_sub_tie(self, i):
-        return " " not in self.buttons_state[i]
-
-    # Function to check if there's a winner
-    def check_winner(self, player):
-        win_conditions = [
-            (0, 1, 2),
-            (3, 4, 5),
-            (6, 7, 8),  # Rows
-            (0, 3, 6),
-            (1, 4, 7),
-            (2, 5, 8),  # Columns
-            (0, 4, 8),
-            (2, 4, 6),  # Diagonals
-        ]
-        for condition in win_conditions:
-            if (
-                self.sub_board_state[condition[0]]
-                == self.sub_board_state[condition[1]]
-                == self.sub_board_state[condition[2]]
-                == player
-            ):
-                return True
-        return False
-
-    # Function to check for a tie
-    def check_tie(self):
-        return " " not in self.sub_board_state
-
     # Function to run the game
     def run(self):
         # Create a 3x3 grid of 3x3 grid buttons with background colors
@@ -235,7 +160,7 @@ class TicTacToeGame:
                     width=5,
                     height=2,
                     bg=self.colors[i % 2],
-                    command=lambda p=(i, j): self.player_move(p),
+                    command=lambda p=(i, j): self.human_move(p),
                 )
                 button.grid(row=i // 3 * 3 + j // 3, column=i % 3 * 3 + j % 3)
                 sub_board.append(button)
@@ -313,7 +238,7 @@ class TicTacToeGame:
         self.root.mainloop()
 
 
-# Run the game
+# Run the game, optionally against an AI: python tic_tac_toe.py mcts
 if __name__ == "__main__":
-    game = TicTacToeGame("0")
+    game = TicTacToeGame(sys.argv[1] if len(sys.argv) > 1 else "0")
     game.run()
@@ -1,95 +1,80 @@
+import sys
 from datetime import datetime
 
+from ultimate_ai import PLAYERS
+from ultimate_engine import NAMES, OPEN, RED, BLUE, TIE, UltimateBoard
+
+SYMBOLS = {OPEN: ".", RED: "R", BLUE: "B", TIE: "T"}
+
 
 class TicTacToeGame:
-    def __init__(self):
-        # Create an empty buttons_state
-        self.buttons_state = [[" " for _ in range(9)] for _ in range(9)]
-        self.sub_board_state = [" " for _ in range(9)]
-        self.current_player = "Red"
-        self.last_place = None
+    def __init__(self, ai=None):
+        # The rules and the board state live in the headless engine
+        self.game = UltimateBoard()
+        self.ai = ai  # Plays Blue when given, e.g. ultimate_ai.MCTSPlayer()
         self.move_log = []  # List to store the move log
         self.game_log = []  # List to store the game log
 
+    @property
+    def current_player(self):
+        return NAMES[self.game.player]
+
+    def print_board(self):
+        # Rows of sub-boards, then rows of cells inside them
+        for row in range(9):
+            if row and row % 3 == 0:
+                print("------+-------+------")
+            cells = []
+            for col in range(9):
+                i, j = row // 3 * 3 + col // 3, row % 3 * 3 + col % 3
+                cells.append(SYMBOLS[self.game.cell(i, j)])
+                if col in (2, 5):
+                    cells.append("|")
+            print(" ".join(cells))
+        print("Sub-boards: " + " ".join(SYMBOLS[m] for m in self.game.macro))
+        if self.game.forced is None:
+            print("Play in any open sub-board")
+        else:
+            print(f"Play in sub-board {self.game.forced}")
+
     def player_move(self):
         while True:
             try:
                 i = int(input("Enter sub-board index (0-8): "))
                 j = int(input("Enter cell index (0-8): "))
-                if self.buttons_state[i][j] == " ":
-                    break
-                else:
-                    print("Cell already taken. Try again.")
             except ValueError:
                 print("Invalid input. Try again.")
-        self.buttons_state[i][j] = self.current_player
-        self.move_log.append((i, j))
-        self.game_log.append((i, j))
-        if self.check_sub_winner(self.current_player, i):
-            self.sub_board_state[i] = self.current_player
-            if self.check_winner(self.current_player):
-                self.game_over(f"Player {self.current_player} wins!")
-                return True
-            elif self.check_tie():
-                self.game_over("It's a tie!")
-                return True
-        elif self.check_sub_tie(i):
-            self.sub_board_state[i] = "Tie"
-            if self.check_tie():
-                self.game_over("It's a tie!")
-                return True
-        self.current_player = "Blue" if self.current_player == "Red" else "Red"
-        self.last_place = j
-        return False
-
-    def check_sub_winner(self, player, i):
-        win_conditions = [
-            (0, 1, 2),
-            (3, 4, 5),
-            (6, 7, 8),  # Rows
-            (0, 3, 6),
-            (1, 4, 7),
-            (2, 5, 8),  # Columns
-            (0, 4, 8),
-            (2, 4, 6),  # Diagonals
-        ]
-        for condition in win_conditions:
-            if (
-                self.buttons_state[i][condition[0]]
-                == self.buttons_state[i][condition[1]]
-                == self.buttons_state[i][condition[2]]
-                == player
-            ):
-                return True
-        return False
+                continue
+            if self.game.is_legal(i, j):
+                break
+            elif not (0 <= i < 9 and 0 <= j < 9):
+                print("Invalid input. Try again.")
+            elif self.game.cell(i, j) != OPEN:
+                print("Cell already taken. Try again.")
+            elif self.game.forced is not None:
+                print(f"You must play in sub-board {self.game.forced}. Try again.")
+            else:
+                print("That sub-board is already decided. Try again.")
+        return self.play(i, j)
 
-    def check_sub_tie(self, i):
-        return " " not in self.buttons_state[i]
+    def ai_move(self):
+        i, j = divmod(self.ai.choose(self.game), 9)
+        print(f"AI plays sub-board {i}, cell {j}")
+        return self.play(i, j)
 
-    def check_winner(self, player):
-        win_conditions = [
-            (0, 1, 2),
-            (3, 4, 5),
-            (6, 7, 8),  # Rows
-            (0, 3, 6),
-            (1, 4, 7),
-            (2, 5, 8),  # Columns
-            (0, 4, 8),
-            (2, 4, 6),  # Diagonals
-        ]
-        for condition in win_conditions:
-            if (
-                self.sub_board_state[condition[0]]
-                == self.sub_board_state[condition[1]]
-                == self.sub_board_state[condition[2]]
-                == player
-            ):
-                return True
+    def play(self, i, j):
+        player = self.current_player
+        self.game.make(i * 9 + j)
+        self.move_log.append((i, j))
+        self.game_log.append((i, j))
+        if self.game.winner == TIE:
+            self.game_over("It's a tie!")
+            return True
+        elif self.game.winner is not None:
+            self.game_over(f"Player {player} wins!")
+            return True
         return False
 
-    def check_tie(self):
-        return " " not in self.sub_board_state
-
     def game_over(self, message):
         file_name = f"tic_tac_toe_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
         with open(file_name, "w") as log_file:
@@ -103,10 +88,15 @@ class TicTacToeGame:
         while True:
             self.print_board()
             print(f"Current player: {self.current_player}")
-            if self.player_move():
+            if self.ai is not None and self.game.player == BLUE:
+                over = self.ai_move()
+            else:
+                over = self.player_move()
+            if over:
                 break
 
 
+# Pass an AI name (e.g. "mcts") to play against it as Blue
 if __name__ == "__main__":
-    game = TicTacToeGame()
+    game = TicTacToeGame(PLAYERS[sys.argv[1]]() if len(sys.argv) > 1 else None)
     game.run()
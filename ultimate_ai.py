@@ -0,0 +1,413 @@
+"""Ultimate 井字棋 AI：基于 ultimate_engine.UltimateBoard 的对手，供两个前端作为第二个玩家使用"""
+
+import functools
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ultimate_engine import (
+    OPEN,
+    RED,
+    BLUE,
+    TIE,
+    BOARD_FULL,
+    WIN_MASKS,
+    UltimateBoard,
+    iter_cells,
+)
+
+MCTS_TIME_MS = 100  # MCTS 每步的默认思考时间
+UCT_C = 1.4  # UCT 探索系数
+
+AB_TIME_MS = 1000  # alpha-beta 每步的默认思考时间
+AB_MAX_DEPTH = 64
+TT_SIZE = 1 << 20  # 置换表条目数超过时清空
+EXACT, LOWER, UPPER = 0, 1, 2  # 置换表条目的边界类型
+WIN_SCORE = 10**6
+SUB_WON = 100  # 赢下一个小棋盘，再乘以 SUB_WEIGHTS 中该小棋盘的权重
+SUB_WEIGHTS = (3, 2, 3, 2, 4, 2, 3, 2, 3)
+MACRO_TWO = 200  # 大棋盘上的两连（第三个小棋盘未决出）
+MICRO_TWO = 10  # 小棋盘内的两连（第三格为空）
+FREE_MOVE = 30  # 走子方可以下在任意小棋盘（对手把它送进了已决出的小棋盘）
+
+
+def random_move(board, rng):
+    """均匀随机取一个合法着法：先在可能的范围内拒绝采样，几次不中再列出全部着法"""
+    mask = board.legal_mask()
+    forced = board.forced
+    for _ in range(8):
+        cell = (
+            forced * 9 + rng.randrange(9) if forced is not None else rng.randrange(81)
+        )
+        if mask >> cell & 1:
+            return cell
+    return rng.choice(list(iter_cells(mask)))
+
+
+def playout(board, rng):
+    """从 board 随机下到终局（会修改 board），返回胜者 RED/BLUE/TIE"""
+    while board.winner is None:
+        board.make(random_move(board, rng))
+    return board.winner
+
+
+class Node:
+    """搜索树节点；wins 以走出 move 的一方 mover 计，和棋记 0.5"""
+
+    __slots__ = ("move", "mover", "parent", "children", "untried", "visits", "wins")
+
+    def __init__(self, move, mover, parent, board, rng):
+        self.move = move
+        self.mover = mover
+        self.parent = parent
+        self.children = {}  # 着法 -> Node
+        self.untried = board.legal_moves()
+        rng.shuffle(self.untried)
+        self.visits = 0
+        self.wins = 0.0
+
+    def select(self, c):
+        log_n = math.log(self.visits)
+        return max(
+            self.children.values(),
+            key=lambda n: n.wins / n.visits + c * math.sqrt(log_n / n.visits),
+        )
+
+
+class MCTSPlayer:
+    """UCT 搜索：每步按 time_ms 或 playouts 的预算做随机模拟，选访问次数最多的着法
+
+    走完一步后保留所选着法下的子树，下次调用时沿对手的实际着法继续往下复用。
+    last 记录上一步的模拟次数 playouts、用时 time_ms 和 playouts_per_s。
+    """
+
+    def __init__(self, time_ms=MCTS_TIME_MS, playouts=None, c=UCT_C, seed=None):
+        self.time_ms = time_ms
+        self.playouts = playouts
+        self.c = c
+        self.rng = random.Random(seed)
+        self.root = None
+        self.root_moves = ()  # 树根对应局面的着法序列
+        self.last = {}
+
+    def reuse(self, board):
+        """找到与 board 对应的树根；着法序列接不上时新建一棵树"""
+        moves = [cell for cell, *_ in board.history]
+        n = len(self.root_moves)
+        node = self.root
+        if node is not None and tuple(moves[:n]) == self.root_moves:
+            for cell in moves[n:]:
+                node = node.children.get(cell)
+                if node is None:
+                    break
+        else:
+            node = None
+        if node is None:
+            mover = BLUE if board.player == RED else RED
+            node = Node(None, mover, None, board, self.rng)
+        node.parent = None
+        self.root, self.root_moves = node, tuple(moves)
+        return node
+
+    def search(self, board, root):
+        """按预算从 root 做模拟，返回模拟次数"""
+        rng, c = self.rng, self.c
+        deadline = None
+        if self.playouts is None:
+            deadline = time.perf_counter() + self.time_ms / 1000
+        count = 0
+        while True:
+            if deadline is None:
+                if count >= self.playouts:
+                    break
+            elif not count & 15 and time.perf_counter() >= deadline:
+                break
+            node, b = root, board.copy()
+            while not node.untried and node.children:
+                node = node.select(c)
+                b.make(node.move)
+            if node.untried and b.winner is None:
+                cell = node.untried.pop()
+                mover = b.player
+                b.make(cell)
+                child = Node(cell, mover, node, b, rng)
+                node.children[cell] = child
+                node = child
+            winner = playout(b, rng)
+            while node is not None:
+                node.visits += 1
+                if winner == node.mover:
+                    node.wins += 1
+                elif winner == TIE:
+                    node.wins += 0.5
+                node = node.parent
+            count += 1
+        return count
+
+    def choose(self, board):
+        """返回 board 上当前走子方的着法（格子编号）"""
+        start = time.perf_counter()
+        root = self.reuse(board)
+        playouts = self.search(board, root)
+        child = max(root.children.values(), key=lambda n: n.visits)
+        elapsed = time.perf_counter() - start
+        self.last = {
+            "playouts": playouts,
+            "time_ms": elapsed * 1000,
+            "playouts_per_s": playouts / elapsed if elapsed else 0.0,
+            "visits": child.visits,
+            "win_rate": child.wins / child.visits,
+        }
+        child.parent = None
+        self.root, self.root_moves = child, self.root_moves + (child.move,)
+        return child.move
+
+
+_worker_player = None  # 每个工作进程各自的 MCTSPlayer，跨着法保留搜索树
+
+
+def _worker_search(moves, time_ms, playouts):
+    """工作进程：从着法序列复原局面并搜索，返回 (根节点各着法本次增加的访问次数, 模拟次数)
+
+    复用的树里已有的访问次数不计入，同一进程在一次 choose 中领到多个任务时也不会重复计数。
+    """
+    global _worker_player
+    if _worker_player is None:
+        _worker_player = MCTSPlayer()
+    player = _worker_player
+    player.time_ms, player.playouts = time_ms, playouts
+    board = UltimateBoard()
+    for cell in moves:
+        board.make(cell)
+    root = player.reuse(board)
+    before = {cell: child.visits for cell, child in root.children.items()}
+    count = player.search(board, root)
+    visits = {
+        cell: child.visits - before.get(cell, 0)
+        for cell, child in root.children.items()
+    }
+    return visits, count
+
+
+class ParallelMCTSPlayer:
+    """根并行 MCTS：workers 个进程各自独立搜索同一局面，合并根节点的访问次数选着法
+
+    进程池在第一次调用时创建并一直保留，用完调用 close()。
+    time_ms、playouts 为每个进程的预算，last 中的 playouts 为各进程之和。
+    """
+
+    def __init__(self, workers=None, time_ms=MCTS_TIME_MS, playouts=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.time_ms = time_ms
+        self.playouts = playouts
+        self.pool = None
+        self.last = {}
+
+    def choose(self, board):
+        """返回 board 上当前走子方的着法（格子编号）"""
+        start = time.perf_counter()
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers)
+        moves = [cell for cell, *_ in board.history]
+        futures = [
+            self.pool.submit(_worker_search, moves, self.time_ms, self.playouts)
+            for _ in range(self.workers)
+        ]
+        visits, playouts = {}, 0
+        for future in futures:
+            counts, count = future.result()
+            for cell, n in counts.items():
+                visits[cell] = visits.get(cell, 0) + n
+            playouts += count
+        move = max(visits, key=visits.get)
+        elapsed = time.perf_counter() - start
+        self.last = {
+            "playouts": playouts,
+            "time_ms": elapsed * 1000,
+            "playouts_per_s": playouts / elapsed if elapsed else 0.0,
+            "visits": visits[move],
+            "workers": self.workers,
+        }
+        return move
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+
+@functools.lru_cache(maxsize=None)
+def twos(own, other):
+    """9 位占位中 own 占两格、第三格没有被 other 占的线数"""
+    return sum(1 for m in WIN_MASKS if not other & m and bin(own & m).count("1") == 2)
+
+
+def evaluate(board):
+    """走子方视角的局面评分：小棋盘胜负、大/小棋盘上的两连、能否任意落子"""
+    red, blue = board.bits[RED], board.bits[BLUE]
+    score = ties = 0
+    for i, state in enumerate(board.macro):
+        if state == OPEN:
+            r = red >> 9 * i & BOARD_FULL
+            b = blue >> 9 * i & BOARD_FULL
+            score += MICRO_TWO * (twos(r, b) - twos(b, r))
+        elif state == RED:
+            score += SUB_WON * SUB_WEIGHTS[i]
+        elif state == BLUE:
+            score -= SUB_WON * SUB_WEIGHTS[i]
+        else:
+            ties |= 1 << i
+    mr, mb = board.macro_bits[RED], board.macro_bits[BLUE]
+    score += MACRO_TWO * (twos(mr, mb | ties) - twos(mb, mr | ties))
+    if board.player == BLUE:
+        score = -score
+    if board.forced is None and board.history:
+        score += FREE_MOVE
+    return score
+
+
+def to_tt(value, ply):
+    """胜负分存入置换表前换成距离本节点的手数，与在哪一层搜到无关"""
+    if value >= WIN_SCORE - AB_MAX_DEPTH:
+        return value + ply
+    if value <= AB_MAX_DEPTH - WIN_SCORE:
+        return value - ply
+    return value
+
+
+def from_tt(value, ply):
+    """to_tt 的逆变换：置换表中的胜负分换回距离根节点的手数"""
+    if value >= WIN_SCORE - AB_MAX_DEPTH:
+        return value - ply
+    if value <= AB_MAX_DEPTH - WIN_SCORE:
+        return value + ply
+    return value
+
+
+class SearchTimeout(Exception):
+    """搜索超过截止时间"""
+
+
+class AlphaBetaPlayer:
+    """迭代加深的 negamax alpha-beta 搜索，置换表以 UltimateBoard.hash() 为键
+
+    每步在 time_ms 内从 1 层逐层加深，超时则采用最后一轮完整搜索的结果；
+    time_ms=None 时只按 max_depth 搜索，同样的对局总是下出同样的着法。
+    置换表和 history 走法排序表在各步之间保留。
+    last 记录上一步完成的深度 depth、得分 score、节点数 nodes、用时 time_ms 和 nodes_per_s。
+    """
+
+    def __init__(self, time_ms=AB_TIME_MS, max_depth=None):
+        self.time_ms = time_ms
+        self.max_depth = max_depth or AB_MAX_DEPTH
+        self.tt = {}  # hash -> (depth, flag, value, move)
+        self.history = [0] * 81
+        self.deadline = None
+        self.nodes = 0
+        self.last = {}
+
+    def expired(self):
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def order(self, board, hash_move):
+        """置换表着法优先，其余按 history 得分排序"""
+        history = self.history
+        moves = sorted(board.legal_moves(), key=lambda c: -history[c])
+        if hash_move is not None and hash_move in moves:
+            moves.remove(hash_move)
+            moves.insert(0, hash_move)
+        return moves
+
+    def negamax(self, board, depth, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & 1023 and self.expired():
+            raise SearchTimeout
+        if board.winner is not None:
+            # 上一手结束了对局，走子方不可能是胜者
+            return 0 if board.winner == TIE else ply - WIN_SCORE
+        if depth == 0:
+            return evaluate(board)
+        key = board.hash()
+        alpha0, hash_move = alpha, None
+        e = self.tt.get(key)
+        if e is not None:
+            e_depth, flag, value, hash_move = e
+            value = from_tt(value, ply)
+            if e_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+        best, best_move = -WIN_SCORE - 1, None
+        for cell in self.order(board, hash_move):
+            board.make(cell)
+            val = -self.negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.unmake()
+            if val > best:
+                best, best_move = val, cell
+            if val > alpha:
+                alpha = val
+            if alpha >= beta:
+                self.history[cell] += depth * depth
+                break
+        flag = UPPER if best <= alpha0 else LOWER if best >= beta else EXACT
+        self.tt[key] = (depth, flag, to_tt(best, ply), best_move)
+        return best
+
+    def root(self, board, depth, moves):
+        """搜索根节点，返回 (得分, 最好着法)"""
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        best_move = None
+        for cell in moves:
+            board.make(cell)
+            val = -self.negamax(board, depth - 1, -beta, -alpha, 1)
+            board.unmake()
+            if best_move is None or val > alpha:
+                alpha, best_move = val, cell
+        return alpha, best_move
+
+    def choose(self, board):
+        """返回 board 上当前走子方的着法（格子编号）"""
+        start = time.perf_counter()
+        self.deadline = None
+        if self.time_ms is not None:
+            self.deadline = start + self.time_ms / 1000
+        if len(self.tt) > TT_SIZE:
+            self.tt.clear()
+        self.nodes = 0
+        b = board.copy()
+        moves = self.order(b, None)
+        best_move, score, depth = moves[0], 0, 0
+        for d in range(1, self.max_depth + 1):
+            try:
+                score, best_move = self.root(b, d, moves)
+            except SearchTimeout:
+                break
+            depth = d
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+            if abs(score) >= WIN_SCORE - AB_MAX_DEPTH:
+                break  # 已经算出胜负
+        elapsed = time.perf_counter() - start
+        self.last = {
+            "depth": depth,
+            "score": score,
+            "nodes": self.nodes,
+            "time_ms": elapsed * 1000,
+            "nodes_per_s": self.nodes / elapsed if elapsed else 0.0,
+        }
+        return best_move
+
+
+# 前端可选的 AI：名称 -> 构造函数
+PLAYERS = {
+    "mcts": MCTSPlayer,
+    "mcts-parallel": ParallelMCTSPlayer,
+    "alphabeta": AlphaBetaPlayer,
+}
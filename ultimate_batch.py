@@ -0,0 +1,116 @@
+"""Ultimate 井字棋批量随机对局：N 个局面用 NumPy 数组同步走子，直到全部下完
+
+局面沿用 buttons_state / sub_board_state / last_place 的表示，取值为 ultimate_engine 的常量：
+    buttons    (N, 9, 9)  buttons[n, i, j] 为第 i 个小棋盘第 j 格的 OPEN/RED/BLUE
+    sub_board  (N, 9)     小棋盘状态 OPEN/RED/BLUE/TIE
+    last_place (N,)       上一手在小棋盘内的格子编号，-1 表示第一手
+    player     (N,)       走子方，省略时按双方棋子数推断（RED 先手）
+每个小棋盘在内部存为双方各一个 9 位整数，三连判断、空格计数和第 k 个空格都查预先算好的表。
+"""
+
+import numpy as np
+
+from ultimate_engine import OPEN, RED, BLUE, TIE, BOARD_FULL, WINS as _WINS
+
+WINS = np.array(_WINS)  # 9 位占位 -> 是否有三连
+POPCOUNT = np.array([bin(m).count("1") for m in range(512)], dtype=np.int16)
+# NTH[m, k]：9 位占位 m 中第 k 个为 1 的位
+NTH = np.zeros((512, 9), dtype=np.int16)
+for _m in range(512):
+    _bits = [k for k in range(9) if _m >> k & 1]
+    NTH[_m, : len(_bits)] = _bits
+BIT = (1 << np.arange(9)).astype(np.int16)
+
+
+def from_boards(boards):
+    """UltimateBoard 列表 -> (buttons, sub_board, last_place, player)"""
+    n = len(boards)
+    buttons = np.zeros((n, 9, 9), dtype=np.int8)
+    sub_board = np.zeros((n, 9), dtype=np.int8)
+    last_place = np.full(n, -1, dtype=np.int8)
+    player = np.zeros(n, dtype=np.int8)
+    for k, board in enumerate(boards):
+        for p in (RED, BLUE):
+            for i in range(9):
+                for j in range(9):
+                    if board.bits[p] >> (i * 9 + j) & 1:
+                        buttons[k, i, j] = p
+        sub_board[k] = board.macro
+        if board.history:
+            last_place[k] = board.history[-1][0] % 9
+        player[k] = board.player
+    return buttons, sub_board, last_place, player
+
+
+def playouts(buttons, sub_board, last_place, player=None, games=1, rng=None):
+    """每个局面随机下完 games 局，返回 (N, 3) 的计数：RED 胜、BLUE 胜、和棋
+
+    所有对局同步推进，每一步对仍在进行的对局一起均匀地随机选一个合法着法。
+    """
+    rng = np.random.default_rng(rng)
+    buttons = np.asarray(buttons)
+    sub_board = np.asarray(sub_board)
+    positions = len(buttons)
+    if player is None:
+        red = (buttons == RED).sum(axis=(1, 2))
+        blue = (buttons == BLUE).sum(axis=(1, 2))
+        player = np.where(red > blue, BLUE, RED)
+
+    # 每个局面复制 games 份
+    origin = np.repeat(np.arange(positions), games)
+    buttons = buttons[origin]
+    sub_board = sub_board[origin]
+    last = np.asarray(last_place, dtype=np.int64)[origin]
+    player = np.asarray(player, dtype=np.int64)[origin]
+    n = len(origin)
+
+    bits = np.zeros((3, n, 9), dtype=np.int16)  # bits[p, 局, 小棋盘] 为 9 位占位
+    for p in (RED, BLUE):
+        bits[p] = ((buttons == p) * BIT).sum(axis=2)
+    macro = np.zeros((3, n), dtype=np.int16)
+    for p in (RED, BLUE):
+        macro[p] = ((sub_board == p) * BIT).sum(axis=1)
+    decided = ((sub_board != OPEN) * BIT).sum(axis=1).astype(np.int16)
+    winner = np.zeros(n, dtype=np.int8)
+    for p in (RED, BLUE):
+        winner[WINS[macro[p]]] = p
+    winner[(winner == 0) & (decided == BOARD_FULL)] = TIE
+
+    idx = np.flatnonzero(winner == 0)
+    while len(idx):
+        p = player[idx]
+        empty = BOARD_FULL ^ (bits[RED, idx] | bits[BLUE, idx])
+        open_sub = (decided[idx, None] & BIT) == 0
+        lp = last[idx]
+        rows = np.arange(len(idx))
+        forced = (lp >= 0) & open_sub[rows, np.maximum(lp, 0)]
+        allowed = np.where(forced[:, None], np.arange(9) == lp[:, None], open_sub)
+
+        # 先按空格数加权选小棋盘，再在其中选第 k 个空格，整体对合法着法均匀
+        counts = POPCOUNT[empty] * allowed
+        cum = counts.cumsum(axis=1)
+        r = (rng.random(len(idx)) * cum[:, -1]).astype(np.int64)
+        sub = (cum > r[:, None]).argmax(axis=1)
+        k = r - (cum[rows, sub] - counts[rows, sub])
+        cell = NTH[empty[rows, sub], k]
+
+        mine = bits[p, idx, sub] | BIT[cell]
+        bits[p, idx, sub] = mine
+        won = WINS[mine]
+        full = (mine | bits[3 - p, idx, sub]) == BOARD_FULL
+        closed = won | full
+        decided[idx[closed]] |= BIT[sub[closed]]
+        won_idx, won_p = idx[won], p[won]
+        macro[won_p, won_idx] |= BIT[sub[won]]
+        line = WINS[macro[won_p, won_idx]]
+        winner[won_idx[line]] = won_p[line]
+        winner[idx[(winner[idx] == 0) & (decided[idx] == BOARD_FULL)]] = TIE
+
+        last[idx] = cell
+        player[idx] = 3 - p
+        idx = idx[winner[idx] == 0]
+
+    result = np.zeros((positions, 3), dtype=np.int64)
+    for column, w in enumerate((RED, BLUE, TIE)):
+        result[:, column] = np.bincount(origin[winner == w], minlength=positions)
+    return result
@@ -0,0 +1,138 @@
+"""Ultimate 井字棋引擎：无界面，供 tic_tac_toe.py（图形）和 tic_tac_toe_noUI.py（控制台）共用
+
+格子编号 cell = i * 9 + j，i 为小棋盘编号，j 为小棋盘内的格子编号，均为 0-8。
+双方的棋子各存为一个 81 位整数，另有 9 项的大棋盘状态 macro。
+"""
+
+import random
+
+OPEN, RED, BLUE, TIE = 0, 1, 2, 3
+NAMES = {RED: "Red", BLUE: "Blue", TIE: "Tie"}
+
+WIN_LINES = [
+    (0, 1, 2),
+    (3, 4, 5),
+    (6, 7, 8),  # Rows
+    (0, 3, 6),
+    (1, 4, 7),
+    (2, 5, 8),  # Columns
+    (0, 4, 8),
+    (2, 4, 6),  # Diagonals
+]
+WIN_MASKS = [sum(1 << k for k in line) for line in WIN_LINES]
+# 9 位小棋盘（或大棋盘）占位 -> 是否有三连
+WINS = [any(m & mask == mask for mask in WIN_MASKS) for m in range(512)]
+BOARD_FULL = 0x1FF
+SUB_MASKS = [BOARD_FULL << (9 * i) for i in range(9)]
+ALL_CELLS = (1 << 81) - 1
+
+_zobrist_rng = random.Random(81)
+ZOBRIST = [None] + [
+    [_zobrist_rng.getrandbits(64) for _ in range(81)] for _ in (RED, BLUE)
+]
+ZOBRIST_FORCED = [_zobrist_rng.getrandbits(64) for _ in range(10)]  # 下标 9 表示任意
+ZOBRIST_SIDE = _zobrist_rng.getrandbits(64)
+
+
+def iter_cells(m):
+    while m:
+        low = m & -m
+        yield low.bit_length() - 1
+        m ^= low
+
+
+class UltimateBoard:
+    """局面：make/unmake 为 O(1)，legal_moves 遵守 last_place 规则
+
+    上一手下在小棋盘内的第 j 格时，下一手必须下在第 j 个小棋盘；
+    该小棋盘已经决出（胜或满）时可以下在任意未决出的小棋盘。
+    """
+
+    def __init__(self):
+        self.bits = [0, 0, 0]  # 下标为 RED/BLUE
+        self.macro = [OPEN] * 9
+        self.macro_bits = [0, 0, 0]
+        self.open_cells = ALL_CELLS  # 未决出的小棋盘的所有格子
+        self.forced = None  # 下一手必须下的小棋盘，None 表示任意
+        self.player = RED
+        self.winner = None  # RED/BLUE/TIE，None 表示未结束
+        self.key = 0  # 棋子的 Zobrist 哈希
+        self.history = []  # (cell, forced, winner, 本手是否决出了小棋盘)
+
+    def copy(self):
+        board = UltimateBoard.__new__(UltimateBoard)
+        board.bits = self.bits[:]
+        board.macro = self.macro[:]
+        board.macro_bits = self.macro_bits[:]
+        board.open_cells = self.open_cells
+        board.forced = self.forced
+        board.player = self.player
+        board.winner = self.winner
+        board.key = self.key
+        board.history = self.history[:]
+        return board
+
+    def hash(self):
+        """包含走子方和限定小棋盘的局面哈希"""
+        key = self.key ^ ZOBRIST_FORCED[9 if self.forced is None else self.forced]
+        return key ^ ZOBRIST_SIDE if self.player == BLUE else key
+
+    def cell(self, i, j):
+        c = i * 9 + j
+        if self.bits[RED] >> c & 1:
+            return RED
+        if self.bits[BLUE] >> c & 1:
+            return BLUE
+        return OPEN
+
+    def legal_mask(self):
+        if self.winner is not None:
+            return 0
+        empty = ~(self.bits[RED] | self.bits[BLUE])
+        if self.forced is None:
+            return empty & self.open_cells
+        return empty & SUB_MASKS[self.forced]
+
+    def legal_moves(self):
+        """所有合法着法的格子编号"""
+        return list(iter_cells(self.legal_mask()))
+
+    def is_legal(self, i, j):
+        return 0 <= i < 9 and 0 <= j < 9 and self.legal_mask() >> (i * 9 + j) & 1 == 1
+
+    def make(self, cell):
+        p = self.player
+        i, j = divmod(cell, 9)
+        forced, winner, decided = self.forced, self.winner, False
+        self.bits[p] |= 1 << cell
+        self.key ^= ZOBRIST[p][cell]
+        shift = 9 * i
+        if WINS[self.bits[p] >> shift & BOARD_FULL]:
+            decided = True
+            self.macro[i] = p
+            self.macro_bits[p] |= 1 << i
+            if WINS[self.macro_bits[p]]:
+                self.winner = p
+        elif (self.bits[RED] | self.bits[BLUE]) >> shift & BOARD_FULL == BOARD_FULL:
+            decided = True
+            self.macro[i] = TIE
+        if decided:
+            self.open_cells &= ~SUB_MASKS[i]
+            if self.winner is None and not self.open_cells:
+                self.winner = TIE
+        self.forced = j if self.macro[j] == OPEN else None
+        self.player = BLUE if p == RED else RED
+        self.history.append((cell, forced, winner, decided))
+
+    def unmake(self):
+        cell, self.forced, self.winner, decided = self.history.pop()
+        p = BLUE if self.player == RED else RED
+        self.player = p
+        self.bits[p] &= ~(1 << cell)
+        self.key ^= ZOBRIST[p][cell]
+        if decided:
+            i = cell // 9
+            if self.macro[i] == p:
+                self.macro_bits[p] &= ~(1 << i)
+            self.macro[i] = OPEN
+            self.open_cells |= SUB_MASKS[i]